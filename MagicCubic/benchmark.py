@@ -0,0 +1,173 @@
+"""
+Benchmarks for the hot paths of the cube model in cube_model.py.
+
+Every benchmark is timed with timeit (best of several repeats, each long enough to
+be measurable) and reported as operations per second. Results can be saved as JSON
+and compared against a stored baseline; a benchmark that got slower than the
+threshold allows is reported as a regression and the exit status is 1.
+Runs headless: no window is opened.
+
+Usage:
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json --threshold 0.15
+    python benchmark.py --filter array
+"""
+import sys
+import json
+import time
+import random
+import timeit
+import argparse
+import platform
+import numpy as np
+from cube_model import RubiksCube, ArrayRubiksCube, RubiksCubeBatch, MOVE_NAMES, zobrist_hash
+
+SEED = 2024
+BATCH_SIZE = 1000
+
+def _scrambled(cls):
+    random.seed(SEED)
+    cube = cls()
+    cube.initialize_random(moves=50)
+    return cube
+
+def _benchmarks():
+    # name -> (setup() returning the statement to time, operations per call)
+    def single_move(cls):
+        def setup():
+            cube = _scrambled(cls)
+            return lambda: cube.move('R')
+        return setup
+
+    def mixed_moves(cls):
+        def setup():
+            cube = _scrambled(cls)
+            def statement(move=cube.move):
+                for name in MOVE_NAMES:
+                    move(name)
+            return statement
+        return setup
+
+    def initialize_random(cls):
+        def setup():
+            cube = cls()
+            return lambda: cube.initialize_random(moves=100)
+        return setup
+
+    def method(cls, name, solved=False):
+        def setup():
+            cube = cls() if solved else _scrambled(cls)
+            return getattr(cube, name)
+        return setup
+
+    def full_hash():
+        # ArrayRubiksCube.hash64 caches its result, so time the full computation directly
+        cube = _scrambled(ArrayRubiksCube)
+        return lambda: zobrist_hash(cube.state)
+
+    def move_then_hash():
+        # A move drops the cached hash, so hash64 recomputes it
+        cube = _scrambled(ArrayRubiksCube)
+        cube.hash64()
+        def statement(move=cube.move, hash64=cube.hash64):
+            move('R')
+            hash64()
+        return statement
+
+    def batch_moves():
+        np.random.seed(SEED)
+        batch = RubiksCubeBatch.solved(BATCH_SIZE)
+        batch.initialize_random(moves=20)
+        return lambda: batch.move('R')
+
+    benchmarks = {}
+    for label, cls in (('list', RubiksCube), ('array', ArrayRubiksCube)):
+        benchmarks.update({
+            f'{label}.move': (single_move(cls), 1),
+            f'{label}.mixed_moves': (mixed_moves(cls), len(MOVE_NAMES)),
+            f'{label}.initialize_random': (initialize_random(cls), 1),
+            f'{label}.is_solved': (method(cls, 'is_solved'), 1),
+            f'{label}.is_solved_solved': (method(cls, 'is_solved', solved=True), 1),
+            f'{label}.copy': (method(cls, 'copy'), 1),
+            f'{label}.canonical_hash': (method(cls, 'canonical_hash'), 1),
+        })
+    benchmarks.update({
+        'list.hash64': (method(RubiksCube, 'hash64'), 1),
+        'array.hash64': (full_hash, 1),
+        'array.move_hash64': (move_then_hash, 1),
+    })
+    benchmarks['batch.move'] = (batch_moves, BATCH_SIZE)
+    return benchmarks
+
+def run(pattern=None, repeat=5, min_time=0.2, verbose=True):
+    """
+    Run every benchmark whose name contains pattern.
+    Returns {name: {'ops_per_second': ..., 'us_per_op': ...}}.
+    """
+    results = {}
+    for name, (setup, operations) in _benchmarks().items():
+        if pattern and pattern not in name:
+            continue
+        timer = timeit.Timer(setup())
+        number, seconds = timer.autorange()
+        number = max(1, int(number * min_time / max(seconds, 1e-9)))
+        best = min(timer.repeat(repeat=repeat, number=number)) / (number * operations)
+        results[name] = {'ops_per_second': 1 / best, 'us_per_op': best * 1e6}
+        if verbose:
+            print(f"{name:32s} {1 / best:>14,.0f} ops/s {best * 1e6:>10.2f} us/op")
+    return results
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compare results with a baseline (both as returned by run).
+    Prints one line per benchmark and returns the names that are slower than
+    the baseline by more than the threshold fraction.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:32s} {'(no baseline)':>14s}")
+            continue
+        ratio = result['ops_per_second'] / baseline[name]['ops_per_second']
+        status = ''
+        if ratio < 1 - threshold:
+            status = 'REGRESSION'
+            regressions.append(name)
+        elif ratio > 1 + threshold:
+            status = 'faster'
+        print(f"{name:32s} {ratio:>13.2f}x {status}")
+    return regressions
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'system': platform.system(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the RubiksCube model")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare against a JSON file written with --output")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="allowed slowdown before a benchmark counts as a regression (default 0.1 = 10%%)")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.filter, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"Saved {len(results)} results to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.baseline} (threshold {args.threshold:.0%}):")
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
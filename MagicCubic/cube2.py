@@ -3,6 +3,53 @@ from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
 import sys
+import math
+import numpy as np
+
+
+# Integer matrices of a 90 degree turn about x, y and z (counter-clockwise seen from the positive end)
+QUARTER_TURN_MATRICES = np.array([
+    [[1, 0, 0], [0, 0, -1], [0, 1, 0]],
+    [[0, 0, 1], [0, 1, 0], [-1, 0, 0]],
+    [[0, -1, 0], [1, 0, 0], [0, 0, 1]],
+])
+# Face -> (axis, 1 if the face is at the positive end of the axis, else -1)
+FACE_AXES = {"U": (1, 1), "D": (1, -1), "F": (2, 1), "B": (2, -1), "L": (0, -1), "R": (0, 1)}
+# Keys that turn a face clockwise (counter-clockwise with Shift)
+FACE_KEYS = {K_u: "U", K_d: "D", K_f: "F", K_b: "B", K_l: "L", K_r: "R"}
+
+
+def ray_boxes(min_bounds, max_bounds, origins, directions):
+    """
+    Slab test of many rays against many axis-aligned boxes in one NumPy pass.
+    :param min_bounds, max_bounds: (N, 3) box corners
+    :param origins, directions: (R, 3) rays
+    :return: (t, axis), both (R, N): the entry t of every ray into every box (inf where it
+             misses) and the axis of the face it enters through
+    """
+    origins = np.asarray(origins, dtype=float)[:, None, :]
+    directions = np.asarray(directions, dtype=float)[:, None, :]
+    return slab_test(min_bounds, max_bounds, origins, directions)
+
+
+def slab_test(min_bounds, max_bounds, origins, directions):
+    """
+    Slab test of rays against axis-aligned boxes, all given as (..., 3) arrays that
+    broadcast against each other (e.g. one ray per box for precomputed ray-box pairs).
+    :return: (t, axis) over the broadcast shape, as in ray_boxes
+    """
+    parallel = directions == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t1 = (min_bounds - origins) / directions
+        t2 = (max_bounds - origins) / directions
+    t_low = np.where(parallel, -np.inf, np.minimum(t1, t2))
+    t_high = np.where(parallel, np.inf, np.maximum(t1, t2))
+    # A ray parallel to a slab misses unless it runs inside it
+    outside = (parallel & ((origins < min_bounds) | (origins > max_bounds))).any(axis=-1)
+    axis = t_low.argmax(axis=-1)
+    t_near = t_low.max(axis=-1)
+    hit = ~outside & (t_high.min(axis=-1) >= t_near) & (t_near >= 0)
+    return np.where(hit, t_near, np.inf), axis
 
 
 class SmallCube:
@@ -52,35 +99,53 @@ class SmallCube:
         :param size: Half-size of the cube (default: 0.45)
         :return: True if clicked, False otherwise
         """
+        return self.intersect(ray_origin, ray_direction, size) is not None
+
+    def intersect(self, ray_origin, ray_direction, size=0.45):
+        """
+        Slab test of the ray against this cube.
+        :return: (t, normal) of the entry point, normal being the face the ray enters through,
+                 or None if the ray misses the cube
+        """
         min_bound = [self.position[i] - size for i in range(3)]
         max_bound = [self.position[i] + size for i in range(3)]
 
         t_min = -float("inf")
         t_max = float("inf")
+        entry_axis = 0
 
         for i in range(3):
             if ray_direction[i] != 0:
                 t1 = (min_bound[i] - ray_origin[i]) / ray_direction[i]
                 t2 = (max_bound[i] - ray_origin[i]) / ray_direction[i]
-                t_min = max(t_min, min(t1, t2))
+                if min(t1, t2) > t_min:
+                    t_min = min(t1, t2)
+                    entry_axis = i
                 t_max = min(t_max, max(t1, t2))
             elif ray_origin[i] < min_bound[i] or ray_origin[i] > max_bound[i]:
-                return False
+                return None
 
-        return t_max >= t_min >= 0
+        if not t_max >= t_min >= 0:
+            return None
+        normal = [0, 0, 0]
+        normal[entry_axis] = -1 if ray_direction[entry_axis] > 0 else 1
+        return t_min, tuple(normal)
 
 
 class RubiksCube:
-    def __init__(self):
+    def __init__(self, n=3):
         """
-        Initialize a 3x3 Rubik's Cube composed of 27 SmallCubes.
+        Initialize an n x n x n Rubik's Cube composed of SmallCubes (27 for the 3x3).
         """
+        self.n = n
         self.cubelets = []
+        # Lattice index: grid[i, j, k] is the index in self.cubelets of the cubelet in cell (i, j, k)
+        self.grid = np.full((n, n, n), -1, dtype=np.intp)
         self.create_cube()
 
     def create_cube(self):
         """
-        Create the 3x3 Rubik's Cube by instantiating SmallCube objects.
+        Create the n x n Rubik's Cube by instantiating SmallCube objects.
         """
         # Standard Rubik's Cube face colors
         color_map = {
@@ -92,28 +157,219 @@ class RubiksCube:
             "R": (1, 0, 0),  # Red
         }
 
-        # Define positions for a 3x3 cube
-        for x in range(-1, 2):
-            for y in range(-1, 2):
-                for z in range(-1, 2):
+        # Define positions for an n x n cube, centered on the origin, 1 apart
+        half = (self.n - 1) / 2
+        coordinates = [i - half for i in range(self.n)]
+        for x in coordinates:
+            for y in coordinates:
+                for z in coordinates:
                     # Assign colors to the visible faces of the cubelet
                     colors = {}
-                    if x == -1:
+                    if x == -half:
                         colors[(-1, 0, 0)] = color_map["L"]
-                    if x == 1:
+                    if x == half:
                         colors[(1, 0, 0)] = color_map["R"]
-                    if y == -1:
+                    if y == -half:
                         colors[(0, -1, 0)] = color_map["D"]
-                    if y == 1:
+                    if y == half:
                         colors[(0, 1, 0)] = color_map["U"]
-                    if z == -1:
+                    if z == -half:
                         colors[(0, 0, -1)] = color_map["B"]
-                    if z == 1:
+                    if z == half:
                         colors[(0, 0, 1)] = color_map["F"]
 
                     # Add a new SmallCube to the list
                     self.cubelets.append(SmallCube((x, y, z), colors))
 
+        # Cubelet state as arrays, in self.cubelets order: positions (N, 3) and orientations
+        # (N, 3, 3), the rotation each cubelet has gone through since the solved state
+        self.positions = np.array([cubelet.position for cubelet in self.cubelets], dtype=float)
+        self.orientations = np.tile(np.eye(3, dtype=np.int8), (len(self.cubelets), 1, 1))
+        self.grid[tuple(self.cells(self.positions).T)] = np.arange(len(self.cubelets))
+        self.update_bounds()
+
+    def update_bounds(self, size=0.45, rows=None):
+        """
+        Keep the boxes of all cubelets as (N, 3) min/max arrays, in self.cubelets order,
+        for the vectorized picking below. rows limits the update to the cubelets that moved.
+        """
+        self.bounds_size = size
+        if rows is None:
+            self.min_bounds = self.positions - size
+            self.max_bounds = self.positions + size
+        else:
+            self.min_bounds[rows] = self.positions[rows] - size
+            self.max_bounds[rows] = self.positions[rows] + size
+
+    def cells(self, positions):
+        # Lattice cells of an (N, 3) array of positions
+        return np.rint(positions + (self.n - 1) / 2).astype(np.intp)
+
+    def layer(self, axis, layer):
+        # Indices of the cubelets in one layer (0..n-1 along axis 0 = x, 1 = y, 2 = z)
+        rows = self.grid.take(layer, axis=axis).ravel()
+        return rows[rows >= 0]
+
+    def turn(self, axis, layer, quarter_turns=1):
+        """
+        Turn one layer by quarter_turns * 90 degrees, counter-clockwise seen from the
+        positive end of the axis. The layer's rows come from the lattice index and are
+        rotated with one integer matrix product each for positions and orientations;
+        the color normals of the moved SmallCubes are rotated the same way.
+        """
+        rotation = np.linalg.matrix_power(QUARTER_TURN_MATRICES[axis], quarter_turns % 4)
+        rows = self.layer(axis, layer)
+        self.positions[rows] = self.positions[rows] @ rotation.T
+        self.orientations[rows] = rotation @ self.orientations[rows]
+        self.grid[tuple(self.cells(self.positions[rows]).T)] = rows
+        self.update_bounds(rows=rows)
+        for row in rows.tolist():
+            cubelet = self.cubelets[row]
+            cubelet.position = tuple(self.positions[row].tolist())
+            cubelet.colors = {tuple((rotation @ normal).tolist()): color for normal, color in cubelet.colors.items()}
+
+    def move(self, face, clockwise=True):
+        """
+        Turn an outer face ('U', 'D', 'F', 'B', 'L', 'R') a quarter turn,
+        clockwise as seen from that face.
+        """
+        axis, side = FACE_AXES[face]
+        layer = self.n - 1 if side > 0 else 0
+        self.turn(axis, layer, -side if clockwise else side)
+
+    def intersect_all(self, ray_origin, ray_direction):
+        """
+        Slab test of one ray against every cubelet at once.
+        :return: (t, axis) arrays with one entry per cubelet, t being inf where the ray misses
+        """
+        t, axis = ray_boxes(self.min_bounds, self.max_bounds, [ray_origin], [ray_direction])
+        return t[0], axis[0]
+
+    def candidates(self, ray_origin, ray_direction):
+        """
+        Indices of the cubelets whose bounding sphere the ray passes through, from one
+        (N, 3) @ (3,) product. Only these can be hit, and along a ray they are O(n) of the
+        n^3 cubelets, so the slab test runs on a handful of boxes instead of all of them.
+        """
+        direction = np.asarray(ray_direction, dtype=float)
+        offsets = self.positions - np.asarray(ray_origin, dtype=float)
+        along = offsets @ (direction / math.sqrt(direction @ direction))
+        radius = math.sqrt(3) * self.bounds_size
+        distance2 = np.einsum('ij,ij->i', offsets, offsets) - along * along
+        # Spheres entirely behind the origin are skipped as well
+        return np.flatnonzero((distance2 <= radius * radius + 1e-9) & (along >= -radius))
+
+    def candidate_pairs(self, ray_origins, ray_directions):
+        """
+        The candidates of many rays at once, as (ray indices, cubelet indices) of the pairs
+        whose sphere test passes. Distances come from two (R, 3) @ (3, N) products, updated
+        in place; spheres behind the origin are left to the slab test, which rejects t < 0.
+        """
+        positions = self.positions.T
+        units = ray_directions / np.linalg.norm(ray_directions, axis=1, keepdims=True)
+        radius = math.sqrt(3) * self.bounds_size
+        # Squared distance along each ray to the cubelet centers
+        along = units @ positions
+        along -= np.einsum('ij,ij->i', ray_origins, units)[:, None]
+        along *= along
+        # |center - origin|^2 - along^2 - radius^2, the tolerance guarding against rounding
+        distance2 = ray_origins @ positions
+        distance2 *= -2
+        distance2 += np.einsum('ij,ij->j', positions, positions)
+        distance2 += (np.einsum('ij,ij->i', ray_origins, ray_origins) - radius * radius - 1e-9)[:, None]
+        distance2 -= along
+        return np.nonzero(distance2 <= 0)
+
+    def pick(self, ray_origin, ray_direction):
+        """
+        Nearest cubelet hit by a ray: the vectorized slab test over the candidate cubelets.
+        :return: (cubelet, normal of the face that was hit), or (None, None)
+        """
+        rows = self.candidates(ray_origin, ray_direction)
+        if len(rows) == 0:
+            return None, None
+        t, axis = ray_boxes(self.min_bounds[rows], self.max_bounds[rows], [ray_origin], [ray_direction])
+        index = int(t[0].argmin())
+        if math.isinf(t[0, index]):
+            return None, None
+        normal = [0, 0, 0]
+        normal[axis[0, index]] = -1 if ray_direction[axis[0, index]] > 0 else 1
+        return self.cubelets[rows[index]], tuple(normal)
+
+    def pick_many(self, ray_origins, ray_directions):
+        """
+        Nearest cubelet of many rays in one call, e.g. for hover highlighting.
+        :return: (indices into self.cubelets, -1 where a ray hits nothing; t of each hit)
+        """
+        origins = np.asarray(ray_origins, dtype=float)
+        directions = np.asarray(ray_directions, dtype=float)
+        rays, rows = self.candidate_pairs(origins, directions)
+        t, _ = slab_test(self.min_bounds[rows], self.max_bounds[rows], origins[rays], directions[rays])
+        # Nearest hit of every ray: sort the pairs by ray, then by t, and keep the first of each ray
+        order = np.lexsort((t, rays))
+        first = order[np.flatnonzero(np.diff(rays[order], prepend=-1))]
+        first = first[np.isfinite(t[first])]
+        indices = np.full(len(origins), -1, dtype=np.intp)
+        t_nearest = np.full(len(origins), np.inf)
+        indices[rays[first]] = rows[first]
+        t_nearest[rays[first]] = t[first]
+        return indices, t_nearest
+
+    def ray_cast(self, ray_origin, ray_direction, size=0.45):
+        """
+        Find the nearest cubelet a ray hits by walking the lattice cells along the ray (3D DDA).
+        Cells are visited in the order the ray passes through them and every cubelet lies
+        inside its own cell, so the first hit is the nearest one. Only O(n) cells are visited
+        instead of testing all n^3 cubelets.
+        :return: (cubelet, normal of the face that was hit), or (None, None)
+        """
+        n = self.n
+        # Clip the ray to the lattice box [-n/2, n/2]^3
+        t_enter, t_exit = 0.0, float("inf")
+        for i in range(3):
+            if ray_direction[i] != 0:
+                t1 = (-n / 2 - ray_origin[i]) / ray_direction[i]
+                t2 = (n / 2 - ray_origin[i]) / ray_direction[i]
+                t_enter = max(t_enter, min(t1, t2))
+                t_exit = min(t_exit, max(t1, t2))
+            elif abs(ray_origin[i]) > n / 2:
+                return None, None
+        if t_enter > t_exit:
+            return None, None
+
+        # Starting cell and, per axis, the step direction, the t of the next cell boundary
+        # and the t it takes to cross one whole cell
+        cell, step, t_next, t_delta = [], [], [], []
+        for i in range(3):
+            start = ray_origin[i] + t_enter * ray_direction[i] + n / 2
+            index = min(max(int(math.floor(start)), 0), n - 1)
+            cell.append(index)
+            if ray_direction[i] > 0:
+                step.append(1)
+                t_next.append(t_enter + (index + 1 - start) / ray_direction[i])
+                t_delta.append(1 / ray_direction[i])
+            elif ray_direction[i] < 0:
+                step.append(-1)
+                t_next.append(t_enter + (index - start) / ray_direction[i])
+                t_delta.append(-1 / ray_direction[i])
+            else:
+                step.append(0)
+                t_next.append(float("inf"))
+                t_delta.append(float("inf"))
+
+        while all(0 <= cell[i] < n for i in range(3)):
+            index = self.grid[cell[0], cell[1], cell[2]]
+            if index >= 0:
+                hit = self.cubelets[index].intersect(ray_origin, ray_direction, size)
+                if hit is not None:
+                    return self.cubelets[index], hit[1]
+            axis = t_next.index(min(t_next))
+            if t_next[axis] > t_exit:
+                break
+            cell[axis] += step[axis]
+            t_next[axis] += t_delta[axis]
+        return None, None
+
     def draw(self):
         """
         Draw the entire Rubik's Cube.
@@ -143,24 +399,28 @@ class RubiksCube3DApp:
         """
         Handle a mouse click and detect the clicked cube.
         """
-        # Get the ray direction in world space
+        # Get the ray in the cube's coordinates: the modelview includes the current view rotation
+        glPushMatrix()
+        glRotatef(self.rot_x, 1, 0, 0)
+        glRotatef(self.rot_y, 0, 1, 0)
         viewport = glGetIntegerv(GL_VIEWPORT)
         projection = glGetDoublev(GL_PROJECTION_MATRIX)
         modelview = glGetDoublev(GL_MODELVIEW_MATRIX)
+        glPopMatrix()
 
         win_x = x
         win_y = viewport[3] - y
-        win_z = glReadPixels(win_x, win_y, 1, 1, GL_DEPTH_COMPONENT, GL_FLOAT)
 
-        ray_origin = gluUnProject(win_x, win_y, win_z, modelview, projection, viewport)
+        # Unproject the same pixel on the near and the far plane
+        ray_origin = gluUnProject(win_x, win_y, 0, modelview, projection, viewport)
         ray_far = gluUnProject(win_x, win_y, 1, modelview, projection, viewport)
         ray_direction = [ray_far[i] - ray_origin[i] for i in range(3)]
 
-        # Check each cubelet for intersection
-        for cubelet in self.rubiks_cube.cubelets:
-            if cubelet.is_clicked(ray_origin, ray_direction):
-                print(f"Clicked cube at position {cubelet.position}, colors: {cubelet.colors}")
-                break
+        # Walk the lattice to the nearest cubelet under the mouse
+        cubelet, normal = self.rubiks_cube.ray_cast(ray_origin, ray_direction)
+        if cubelet is not None:
+            print(f"Clicked cube at position {cubelet.position}, face {normal}, "
+                  f"color: {cubelet.colors.get(normal)}")
 
     def handle_events(self):
         """
@@ -182,6 +442,9 @@ class RubiksCube3DApp:
                     dx, dy = event.rel
                     self.rot_x += dy
                     self.rot_y += dx
+            elif event.type == KEYDOWN and event.key in FACE_KEYS:
+                # U, D, F, B, L, R turn that face clockwise, Shift + key counter-clockwise
+                self.rubiks_cube.move(FACE_KEYS[event.key], clockwise=not event.mod & KMOD_SHIFT)
 
     def main_loop(self):
         """
@@ -0,0 +1,840 @@
+"""
+Rubik's Cube data model: the RubiksCube/ArrayRubiksCube sticker models, move
+compilation, hashing, the CubieCube coordinate model and RubiksCubeBatch.
+No pygame, OpenGL or display is needed; the 3D front end lives in cube_view.py.
+"""
+import re
+import random
+import copy
+import math
+import functools
+import itertools
+from collections import namedtuple
+import numpy as np
+
+# Rubik's Cube Data Structure
+class RubiksCube:
+    def __init__(self):
+        # Initialize a solved cube
+        # U: White (W), D: Yellow (Y), F: Green (G), B: Blue (B), L: Orange (O), R: Red (R)
+        self.faces = {
+            'U': [['W'] * 3 for _ in range(3)],
+            'D': [['Y'] * 3 for _ in range(3)],
+            'F': [['G'] * 3 for _ in range(3)],
+            'B': [['B'] * 3 for _ in range(3)],
+            'L': [['O'] * 3 for _ in range(3)],
+            'R': [['R'] * 3 for _ in range(3)]
+        }
+
+    def rotate_face_clockwise(self, face):
+        # Rotate a face 90 degrees clockwise
+        self.faces[face] = [list(row) for row in zip(*self.faces[face][::-1])]
+
+    def rotate_face_counterclockwise(self, face):
+        # Rotate a face 90 degrees counter-clockwise
+        self.faces[face] = [list(row) for row in zip(*self.faces[face])]
+        self.faces[face].reverse()
+
+    def rotate_face_180(self, face):
+        # Rotate a face 180 degrees
+        self.rotate_face_clockwise(face)
+        self.rotate_face_clockwise(face)
+
+    def move(self, move):
+        """
+        Perform a move on the cube.
+        Moves are denoted by:
+        - 'U', 'D', 'F', 'B', 'L', 'R' for clockwise rotations
+        - 'U\'', 'D\'', 'F\'', 'B\'', 'L\'', 'R\'' for counter-clockwise
+        - 'U2', 'D2', 'F2', 'B2', 'L2', 'R2' for 180-degree rotations
+        Anything else of the notation (wide moves, slices, rotations, groups; see
+        parse_algorithm) is applied as an algorithm.
+        """
+        if move not in MOVE_NAMES:
+            self.apply_algorithm(move)
+            return
+        if move.endswith("2"):
+            base_move = move[0]
+            times = 2
+        elif move.endswith("'"):
+            base_move = move[0]
+            times = -1
+        else:
+            base_move = move
+            times = 1
+
+        for _ in range(abs(times)):
+            if times == -1:
+                self._perform_move(base_move, clockwise=False)
+            else:
+                self._perform_move(base_move, clockwise=True)
+
+    # Adjacent faces and the rows/columns a face turn cycles, in clockwise order.
+    # The last flag marks slices read right-to-left / bottom-to-top, so that
+    # sticker k of each slice lands on sticker k of the next one.
+    ADJACENT = {
+        'U': [('B', 0, 'row', False), ('R', 0, 'row', False), ('F', 0, 'row', False), ('L', 0, 'row', False)],
+        'D': [('F', 2, 'row', False), ('R', 2, 'row', False), ('B', 2, 'row', False), ('L', 2, 'row', False)],
+        'F': [('U', 2, 'row', False), ('R', 0, 'col', False), ('D', 0, 'row', True), ('L', 2, 'col', True)],
+        'B': [('U', 0, 'row', False), ('L', 0, 'col', True), ('D', 2, 'row', True), ('R', 2, 'col', False)],
+        'L': [('U', 0, 'col', False), ('F', 0, 'col', False), ('D', 0, 'col', False), ('B', 2, 'col', True)],
+        'R': [('U', 2, 'col', False), ('B', 0, 'col', True), ('D', 2, 'col', False), ('F', 2, 'col', False)]
+    }
+
+    def _perform_move(self, face, clockwise=True):
+        # Rotate the face itself
+        if clockwise:
+            self.rotate_face_clockwise(face)
+        else:
+            self.rotate_face_counterclockwise(face)
+
+        adj = self.ADJACENT[face]
+
+        if clockwise:
+            # Save the last adjacent face's slice, then shift the others forward
+            temp = self._get_slice(adj[3])
+            for i in range(3, 0, -1):
+                self._set_slice(adj[i], self._get_slice(adj[i-1]))
+            self._set_slice(adj[0], temp)
+        else:
+            # Save the first adjacent face's slice, then shift the others backward
+            temp = self._get_slice(adj[0])
+            for i in range(3):
+                self._set_slice(adj[i], self._get_slice(adj[i+1]))
+            self._set_slice(adj[3], temp)
+
+    def _get_slice(self, face_info):
+        face, idx, typ, reverse = face_info
+        if typ == 'row':
+            values = list(self.faces[face][idx])
+        elif typ == 'col':
+            values = [self.faces[face][i][idx] for i in range(3)]
+        else:
+            raise ValueError("Invalid slice type")
+        return values[::-1] if reverse else values
+
+    def _set_slice(self, face_info, values):
+        face, idx, typ, reverse = face_info
+        if reverse:
+            values = values[::-1]
+        if typ == 'row':
+            self.faces[face][idx] = list(values)
+        elif typ == 'col':
+            for i in range(3):
+                self.faces[face][i][idx] = values[i]
+        else:
+            raise ValueError("Invalid slice type")
+
+    def initialize_random(self, moves=100):
+        # Define all possible basic moves
+        basic_moves = ['U', 'D', 'F', 'B', 'L', 'R']
+        modifiers = ['', '\'', '2']
+
+        all_moves = [m + mod for m in basic_moves for mod in modifiers]
+        # Moves allowed after a turn of each face (None: first move)
+        allowed = {face: [m for m in all_moves if m[0] != face] for face in basic_moves}
+        allowed[None] = all_moves
+
+        last_face = None
+        for _ in range(moves):
+            # Prevent repeating the same face move to avoid unnecessary complexity;
+            # drawing from the other faces keeps the scramble at exactly `moves` turns
+            move = random.choice(allowed[last_face])
+            self.move(move)
+            last_face = move[0]
+
+    def is_solved(self):
+        # Check if the cube is in a solved state
+        for face in self.faces:
+            color = self.faces[face][0][0]
+            for row in self.faces[face]:
+                for sticker in row:
+                    if sticker != color:
+                        return False
+        return True
+
+    def apply_algorithm(self, moves):
+        # Apply a whole move sequence as one compiled permutation of the stickers
+        perm = compile_algorithm(moves).permutation
+        stickers = [sticker for face in FACE_ORDER for row in self.faces[face] for sticker in row]
+        stickers = [stickers[i] for i in perm]
+        self.faces = {face: [stickers[f * 9 + r * 3:f * 9 + r * 3 + 3] for r in range(3)]
+                      for f, face in enumerate(FACE_ORDER)}
+
+    def copy(self):
+        # Independent copy of the cube state
+        cube = self.__class__()
+        cube.faces = copy.deepcopy(self.faces)
+        return cube
+
+    def hash64(self):
+        # 64-bit Zobrist hash of the sticker colors, see zobrist_hash
+        return zobrist_hash(faces_to_state(self.faces))
+
+    def canonical_hash(self):
+        # Equal for every cube that is the same state up to rotation, reflection and recoloring
+        return zobrist_hash(canonical_state(faces_to_state(self.faces)))
+
+# Flat sticker layout of the array backend: face-major in FACE_ORDER, then row, then column.
+# Color code i is the solved color of FACE_ORDER[i].
+FACE_ORDER = ('U', 'D', 'F', 'B', 'L', 'R')
+SOLVED_COLORS = ('W', 'Y', 'G', 'B', 'O', 'R')
+COLOR_CODES = {color: code for code, color in enumerate(SOLVED_COLORS)}
+MOVE_NAMES = tuple(face + mod for face in FACE_ORDER for mod in ('', '\'', '2'))
+
+def faces_to_state(faces):
+    # Pack a faces dict into a flat uint8 array of color codes
+    return np.array([COLOR_CODES[sticker]
+                     for face in FACE_ORDER for row in faces[face] for sticker in row], dtype=np.uint8)
+
+def state_to_faces(state):
+    # Unpack a flat color-code array into a faces dict of 3x3 lists
+    colors = [SOLVED_COLORS[code] for code in state.tolist()]
+    return {face: [colors[f * 9 + r * 3:f * 9 + r * 3 + 3] for r in range(3)]
+            for f, face in enumerate(FACE_ORDER)}
+
+def _trace_permutation(action):
+    # Run a list-backend operation on a cube whose stickers are their own flat indices.
+    # The resulting layout is the gather index that reproduces the operation on a flat state.
+    cube = RubiksCube()
+    cube.faces = {face: [[f * 9 + r * 3 + c for c in range(3)] for r in range(3)]
+                  for f, face in enumerate(FACE_ORDER)}
+    action(cube)
+    return np.array([sticker for face in FACE_ORDER for row in cube.faces[face] for sticker in row],
+                    dtype=np.intp)
+
+# new_state = state[perm] for every face turn, derived from RubiksCube._perform_move
+MOVE_PERMUTATIONS = {name: _trace_permutation(lambda cube, name=name: cube.move(name))
+                     for name in MOVE_NAMES}
+FACE_ROTATION_PERMUTATIONS = {
+    (face, True): _trace_permutation(lambda cube, face=face: cube.rotate_face_clockwise(face))
+    for face in FACE_ORDER
+}
+FACE_ROTATION_PERMUTATIONS.update({
+    (face, False): _trace_permutation(lambda cube, face=face: cube.rotate_face_counterclockwise(face))
+    for face in FACE_ORDER
+})
+
+class ArrayRubiksCube(RubiksCube):
+    """
+    RubiksCube backed by a flat uint8 array of the 54 sticker color codes.
+    Each move is a single gather through a precomputed index permutation,
+    so no nested lists are rebuilt or deep-copied.
+    `faces` is still available as a dict view for rendering and conversion.
+    """
+    def __init__(self, state=None):
+        if state is None:
+            state = np.repeat(np.arange(6, dtype=np.uint8), 9)
+        self.state = np.array(state, dtype=np.uint8)
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        self._state = state
+        self._hash = None
+
+    @property
+    def faces(self):
+        return state_to_faces(self.state)
+
+    @faces.setter
+    def faces(self, faces):
+        self.state = faces_to_state(faces)
+
+    @classmethod
+    def from_cube(cls, cube):
+        # Convert any RubiksCube into the array backend
+        return cls(faces_to_state(cube.faces))
+
+    def _permute(self, perm):
+        # Gather the stickers through perm. An XOR update of a cached hash over the ~40 moved
+        # keys costs as much as a full zobrist_hash, so the cache is just dropped
+        self._state = self._state[perm]
+        self._hash = None
+
+    def rotate_face_clockwise(self, face):
+        self._permute(FACE_ROTATION_PERMUTATIONS[(face, True)])
+
+    def rotate_face_counterclockwise(self, face):
+        self._permute(FACE_ROTATION_PERMUTATIONS[(face, False)])
+
+    def move(self, move):
+        # Same notation as RubiksCube.move: 'U', "U'", 'U2', "Rw'", 'M2', 'x', ...
+        perm = NOTATION_PERMUTATIONS.get(move)
+        if perm is None:
+            self.apply_algorithm(move)
+        else:
+            self._permute(perm)
+
+    def _perform_move(self, face, clockwise=True):
+        self.move(face if clockwise else face + "'")
+
+    def apply_algorithm(self, moves):
+        self._permute(compile_algorithm(moves).permutation)
+
+    def is_solved(self):
+        # Byte comparisons, much cheaper than a NumPy reduction. The U face is checked inline
+        # since on a scrambled cube it is almost always mixed already
+        data = self._state.tobytes()
+        return data[:9] == data[:1] * 9 and all(data[i:i + 9] == data[i:i + 1] * 9 for i in range(9, 54, 9))
+
+    def copy(self):
+        cube = self.__class__(self.state)
+        cube._hash = self._hash
+        return cube
+
+    def hash64(self):
+        # Computed on first use and cached until the next move
+        if self._hash is None:
+            self._hash = zobrist_hash(self._state)
+        return self._hash
+
+    def canonical_hash(self):
+        return zobrist_hash(canonical_state(self._state))
+
+def state_of(cube):
+    # Flat color codes of a RubiksCube (either backend), a faces dict or a state array
+    if isinstance(cube, ArrayRubiksCube):
+        return cube.state
+    if isinstance(cube, RubiksCube):
+        return faces_to_state(cube.faces)
+    if isinstance(cube, dict):
+        return faces_to_state(cube)
+    return np.asarray(cube, dtype=np.uint8)
+
+# All face-turn permutations stacked in MOVE_NAMES order, shape (18, 54)
+MOVE_PERMUTATION_TABLE = np.stack([MOVE_PERMUTATIONS[name] for name in MOVE_NAMES])
+
+def sequence_permutation(moves):
+    # Compose a move, an algorithm string or a list of single moves into one gather index
+    if isinstance(moves, str):
+        moves = parse_algorithm(moves)
+    perm = np.arange(54, dtype=np.intp)
+    for move in moves:
+        perm = perm[NOTATION_PERMUTATIONS[move]]
+    return perm
+
+OPPOSITE_FACE = {'U': 'D', 'D': 'U', 'F': 'B', 'B': 'F', 'L': 'R', 'R': 'L'}
+QUARTER_TURNS = {'': 1, '\'': 3, '2': 2}
+TURN_SUFFIX = {1: '', 2: '2', 3: '\''}
+
+# Facelet geometry (U = +y, F = +z, R = +x): the cubelet every sticker sits on and its outward normal
+def _facelet_geometry():
+    cubelets, normals = [], []
+    for face in FACE_ORDER:
+        for r in range(3):
+            for c in range(3):
+                cubelet, normal = {
+                    'U': ((c - 1, 1, r - 1), (0, 1, 0)),
+                    'D': ((c - 1, -1, 1 - r), (0, -1, 0)),
+                    'F': ((c - 1, 1 - r, 1), (0, 0, 1)),
+                    'B': ((1 - c, 1 - r, -1), (0, 0, -1)),
+                    'L': ((-1, 1 - r, c - 1), (-1, 0, 0)),
+                    'R': ((1, 1 - r, 1 - c), (1, 0, 0)),
+                }[face]
+                cubelets.append(cubelet)
+                normals.append(normal)
+    return np.array(cubelets), np.array(normals)
+
+FACELET_CUBELETS, FACELET_NORMALS = _facelet_geometry()
+# A distinct integer point per sticker: 2 * cubelet position + outward normal
+FACELET_POINTS = 2 * FACELET_CUBELETS + FACELET_NORMALS
+_POINT_INDEX = {tuple(point): i for i, point in enumerate(FACELET_POINTS.tolist())}
+CENTER_INDICES = np.arange(6) * 9 + 4
+FACE_NORMALS = {face: FACELET_NORMALS[CENTER_INDICES[f]] for f, face in enumerate(FACE_ORDER)}
+
+def layer_permutation(face, layers, quarter_turns=1):
+    """
+    Gather index that turns the given layers clockwise, as seen from face, by quarter_turns.
+    Layers are cubelet coordinates along the normal of face: 1 is the face itself,
+    0 the middle slice and -1 the opposite face.
+    """
+    axis = FACE_NORMALS[face]
+    cross = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+    # Clockwise seen from outside is -90 degrees about the outward normal
+    rotation = np.linalg.matrix_power(np.outer(axis, axis) - cross, quarter_turns % 4)
+    perm = np.arange(54, dtype=np.intp)
+    for i in np.flatnonzero(np.isin(FACELET_CUBELETS @ axis, layers)):
+        # The sticker that lands on i comes from the point the rotation carries onto i
+        perm[i] = _POINT_INDEX[tuple((rotation.T @ FACELET_POINTS[i]).tolist())]
+    return perm
+
+# Base moves of the notation beyond face turns: (reference face, layers turned with it)
+NOTATION_LAYERS = {face + 'w': (face, (1, 0)) for face in FACE_ORDER}
+NOTATION_LAYERS.update({
+    'M': ('L', (0,)), 'E': ('D', (0,)), 'S': ('F', (0,)),
+    'x': ('R', (1, 0, -1)), 'y': ('U', (1, 0, -1)), 'z': ('F', (1, 0, -1)),
+})
+# Gather index of every single move in canonical form: the 18 face turns (traced from
+# _perform_move) plus wide turns, slices and rotations (from the geometry, which agrees)
+NOTATION_PERMUTATIONS = dict(MOVE_PERMUTATIONS)
+NOTATION_PERMUTATIONS.update({base + TURN_SUFFIX[turns]: layer_permutation(face, layers, turns)
+                              for base, (face, layers) in NOTATION_LAYERS.items() for turns in (1, 2, 3)})
+
+# One notation token: a group bracket or a base move, with an optional repeat count and prime
+_NOTATION_TOKEN = re.compile(r"\s*(?:(\()|(\))|([UDFBLR]w|[UDFBLRudfblrMESxyz]))(\d*)('?)")
+
+def _repeat(moves, count, prime):
+    # moves (base, quarter turns) repeated count times, inverted if primed
+    moves = moves * (int(count) if count else 1)
+    if prime:
+        moves = [(base, -turns) for base, turns in reversed(moves)]
+    return moves
+
+@functools.lru_cache(maxsize=4096)
+def expand_algorithm(text):
+    """
+    Expand move notation into a tuple of single moves in canonical form ('R', "Uw'", 'M2', 'x'),
+    one per written move (R R stays two moves, R3 becomes R', R4 disappears).
+    Understands face turns, wide turns (Rw or r), slices (M, E, S), rotations (x, y, z),
+    repeat counts and primes on any move (R3, R2'), and groups with a repeat count or
+    an inverse, which may nest: "(R U R' U')3", "(R U)'", "((R U)2 F)2".
+    Spaces between moves are optional. Raises ValueError for anything else.
+    """
+    text = text.replace('\u2019', '\'').rstrip()
+    groups = [[]]
+    position = 0
+    while position < len(text):
+        match = _NOTATION_TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"Invalid move notation at position {position}: {text!r}")
+        position = match.end()
+        opening, closing, base, count, prime = match.groups()
+        if opening:
+            if count or prime:
+                raise ValueError(f"Invalid move notation at position {position}: {text!r}")
+            groups.append([])
+        elif closing:
+            if len(groups) == 1:
+                raise ValueError(f"Unbalanced ')' in {text!r}")
+            group = groups.pop()
+            groups[-1].extend(_repeat(group, count, prime))
+        else:
+            if base in 'udfblr':
+                base = base.upper() + 'w'
+            turns = (int(count) if count else 1) * (-1 if prime else 1) % 4
+            if turns:
+                groups[-1].append((base, turns))
+    if len(groups) != 1:
+        raise ValueError(f"Unbalanced '(' in {text!r}")
+    return tuple(base + TURN_SUFFIX[turns % 4] for base, turns in groups[0])
+
+@functools.lru_cache(maxsize=4096)
+def parse_algorithm(text):
+    # expand_algorithm with consecutive turns of the same base move merged (R R' cancels,
+    # R R becomes R2); normalize_algorithm goes further
+    merged = []
+    for move in expand_algorithm(text):
+        base = move.rstrip('\'2')
+        turns = QUARTER_TURNS[move[len(base):]]
+        if merged and merged[-1][0] == base:
+            merged[-1][1] += turns
+        else:
+            merged.append([base, turns])
+    return tuple(base + TURN_SUFFIX[turns % 4] for base, turns in merged if turns % 4)
+
+def parse_move(move):
+    # Split a single move into (base move, clockwise quarter turns), e.g. "Rw'" -> ('Rw', 3)
+    if move not in NOTATION_PERMUTATIONS:
+        moves = parse_algorithm(move)
+        if len(moves) != 1:
+            raise ValueError(f"Invalid move: {move!r}")
+        move = moves[0]
+    base = move.rstrip('\'2')
+    return base, QUARTER_TURNS[move[len(base):]]
+
+def normalize_algorithm(moves):
+    """
+    Parse a move sequence (see parse_algorithm) and cancel and merge redundant turns.
+    Turns of the same base move are summed (U U' cancels, R R becomes R2), and face
+    turns also across a turn of the opposite face since the two commute (U D U becomes U2 D).
+    Returns the reduced sequence as a space-separated string.
+    """
+    if not isinstance(moves, str):
+        moves = ' '.join(moves)
+    stack = []  # [base move, quarter turns]
+    for move in parse_algorithm(moves):
+        base, turns = parse_move(move)
+        if stack and stack[-1][0] == base:
+            index = len(stack) - 1
+        elif (len(stack) >= 2 and base in OPPOSITE_FACE
+              and stack[-1][0] == OPPOSITE_FACE[base] and stack[-2][0] == base):
+            index = len(stack) - 2
+        else:
+            stack.append([base, turns])
+            continue
+        stack[index][1] = (stack[index][1] + turns) % 4
+        if stack[index][1] == 0:
+            del stack[index]
+    return ' '.join(base + TURN_SUFFIX[turns] for base, turns in stack)
+
+# moves: the normalized sequence; permutation: its composed gather index
+CompiledAlgorithm = namedtuple('CompiledAlgorithm', ['moves', 'permutation'])
+
+@functools.lru_cache(maxsize=4096)
+def _compile_normalized(normalized):
+    perm = sequence_permutation(normalized)
+    perm.setflags(write=False)
+    return CompiledAlgorithm(normalized, perm)
+
+@functools.lru_cache(maxsize=4096)
+def _compile_string(moves):
+    return _compile_normalized(normalize_algorithm(moves))
+
+def compile_algorithm(moves):
+    """
+    Compile a move sequence ("R U R' U'", "(R U)3 x' M2" or a list of moves) into a CompiledAlgorithm.
+    Applying the result costs one gather regardless of the sequence length.
+    Results are memoized by the normalized sequence.
+    """
+    if not isinstance(moves, str):
+        moves = ' '.join(moves)
+    return _compile_string(moves)
+
+# State hashing.
+# ZOBRIST_KEYS[i][c] is a fixed random 64-bit key for color code c at sticker i; the hash of
+# a state is the XOR of the keys of its 54 stickers. The seed is fixed so hashes are
+# stable across processes and runs.
+ZOBRIST_KEYS = np.random.default_rng(0x2B7E151628AED2A6).integers(
+    0, 1 << 64, size=(54, 6), dtype=np.uint64, endpoint=False)
+
+STICKER_INDICES = np.arange(54)
+
+def zobrist_hash(state):
+    # 64-bit hash of a flat color-code state as a Python int
+    return int(np.bitwise_xor.reduce(ZOBRIST_KEYS[STICKER_INDICES, state]))
+
+# The 48 symmetries of the cube (24 rotations and their mirror images) as signed permutation
+# matrices, identity first, and the sticker permutation each of them induces
+SYMMETRY_MATRICES = np.array([np.eye(3, dtype=int)[list(axes)] * np.array(signs)[:, None]
+                              for axes in itertools.permutations(range(3))
+                              for signs in itertools.product((1, -1), repeat=3)])
+SYMMETRY_PERMUTATIONS = np.array([[_POINT_INDEX[tuple(point)] for point in (FACELET_POINTS @ matrix.T).tolist()]
+                                  for matrix in SYMMETRY_MATRICES], dtype=np.intp)
+
+def symmetric_states(state):
+    """
+    The 48 images of a flat state under the cube symmetries, shape (48, 54).
+    Each image is recolored so that its centers have the solved colors again, which
+    also maps cubes that only differ by a color scheme onto each other.
+    """
+    states = state[SYMMETRY_PERMUTATIONS]
+    rows = np.arange(len(states))[:, None]
+    recolor = np.empty((len(states), 6), dtype=np.uint8)
+    recolor[rows, states[:, CENTER_INDICES]] = np.arange(6, dtype=np.uint8)
+    return recolor[rows, states]
+
+def canonical_state(state):
+    # The lexicographically smallest of the symmetric states: one representative per class
+    states = symmetric_states(state)
+    return states[np.lexsort(states.T[::-1])[0]]
+
+# Cubie names in Kociemba order
+CORNERS = ('URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB')
+EDGES = ('UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR')
+
+# (face, row, col) of the stickers at each corner/edge position,
+# listed clockwise starting from the U or D sticker (or the F/B sticker for slice edges)
+CORNER_FACELETS = (
+    (('U', 2, 2), ('R', 0, 0), ('F', 0, 2)),
+    (('U', 2, 0), ('F', 0, 0), ('L', 0, 2)),
+    (('U', 0, 0), ('L', 0, 0), ('B', 0, 2)),
+    (('U', 0, 2), ('B', 0, 0), ('R', 0, 2)),
+    (('D', 0, 2), ('F', 2, 2), ('R', 2, 0)),
+    (('D', 0, 0), ('L', 2, 2), ('F', 2, 0)),
+    (('D', 2, 0), ('B', 2, 2), ('L', 2, 0)),
+    (('D', 2, 2), ('R', 2, 2), ('B', 2, 0)),
+)
+EDGE_FACELETS = (
+    (('U', 1, 2), ('R', 0, 1)),
+    (('U', 2, 1), ('F', 0, 1)),
+    (('U', 1, 0), ('L', 0, 1)),
+    (('U', 0, 1), ('B', 0, 1)),
+    (('D', 1, 2), ('R', 2, 1)),
+    (('D', 0, 1), ('F', 2, 1)),
+    (('D', 1, 0), ('L', 2, 1)),
+    (('D', 2, 1), ('B', 2, 1)),
+    (('F', 1, 2), ('R', 1, 0)),
+    (('F', 1, 0), ('L', 1, 2)),
+    (('B', 1, 2), ('L', 1, 0)),
+    (('B', 1, 0), ('R', 1, 2)),
+)
+
+def _perm_rank(values):
+    # Lehmer rank of a sequence of distinct integers; sorted order ranks 0
+    rank = 0
+    for i, value in enumerate(values):
+        rank = rank * (len(values) - i) + sum(1 for other in values[i + 1:] if other < value)
+    return rank
+
+def _perm_unrank(rank, items):
+    # Inverse of _perm_rank over the sorted list of items
+    items = sorted(items)
+    digits = []
+    for base in range(1, len(items) + 1):
+        digits.append(rank % base)
+        rank //= base
+    return [items.pop(digit) for digit in reversed(digits)]
+
+class CubieCube:
+    """
+    Cubie-level cube state: which corner/edge sits at each position and how it is twisted.
+    cp[i]/ep[i] is the corner/edge at position i, co[i] (0..2) and eo[i] (0..1) its orientation.
+    The integer coordinates below are the compact form used by search and lookup tables:
+        twist        corner orientation     0..2186
+        flip         edge orientation       0..2047
+        slice        UD-slice edge places   0..494
+        slice_sorted UD-slice edges         0..11879
+        corners      corner permutation     0..40319
+        edges        edge permutation       0..479001599
+        ud_edges     U/D edge permutation   0..40319 (only while the slice edges are in the slice)
+    """
+    def __init__(self, cp=None, co=None, ep=None, eo=None):
+        self.cp = list(cp) if cp is not None else list(range(8))
+        self.co = list(co) if co is not None else [0] * 8
+        self.ep = list(ep) if ep is not None else list(range(12))
+        self.eo = list(eo) if eo is not None else [0] * 12
+
+    def __eq__(self, other):
+        return (isinstance(other, CubieCube) and self.cp == other.cp and self.co == other.co
+                and self.ep == other.ep and self.eo == other.eo)
+
+    def __repr__(self):
+        return f"CubieCube(cp={self.cp}, co={self.co}, ep={self.ep}, eo={self.eo})"
+
+    def copy(self):
+        return CubieCube(self.cp, self.co, self.ep, self.eo)
+
+    @classmethod
+    def from_faces(cls, faces):
+        """
+        Build a CubieCube from a facelet dict such as RubiksCube.faces.
+        Face colors are taken from the centers, so any color scheme works.
+        """
+        face_of = {faces[face][1][1]: face for face in FACE_ORDER}
+        if len(face_of) != 6:
+            raise ValueError("Invalid cube state: center colors are not distinct")
+        unknown = {color for face in FACE_ORDER for row in faces[face] for color in row} - face_of.keys()
+        if unknown:
+            raise ValueError(f"Invalid cube state: colors {sorted(map(str, unknown))} match no center")
+        cube = cls()
+        for i, facelets in enumerate(CORNER_FACELETS):
+            names = [face_of[faces[face][row][col]] for face, row, col in facelets]
+            for ori in range(3):
+                if names[ori] in ('U', 'D'):
+                    break
+            else:
+                raise ValueError(f"Invalid cube state: no U/D sticker on corner {CORNERS[i]}")
+            turned = names[ori] + names[(ori + 1) % 3] + names[(ori + 2) % 3]
+            if turned not in CORNERS:
+                raise ValueError(f"Invalid cube state: unknown corner at {CORNERS[i]}")
+            cube.cp[i] = CORNERS.index(turned)
+            cube.co[i] = ori
+        for i, facelets in enumerate(EDGE_FACELETS):
+            names = ''.join(face_of[faces[face][row][col]] for face, row, col in facelets)
+            if names in EDGES:
+                cube.ep[i], cube.eo[i] = EDGES.index(names), 0
+            elif names[::-1] in EDGES:
+                cube.ep[i], cube.eo[i] = EDGES.index(names[::-1]), 1
+            else:
+                raise ValueError(f"Invalid cube state: unknown edge at {EDGES[i]}")
+        return cube
+
+    def to_faces(self, colors=None):
+        # Facelet dict in the RubiksCube.faces layout; colors maps face -> sticker color
+        if colors is None:
+            colors = dict(zip(FACE_ORDER, SOLVED_COLORS))
+        faces = {face: [[colors[face]] * 3 for _ in range(3)] for face in FACE_ORDER}
+        for i, facelets in enumerate(CORNER_FACELETS):
+            for k in range(3):
+                face, row, col = facelets[(k + self.co[i]) % 3]
+                faces[face][row][col] = colors[CORNERS[self.cp[i]][k]]
+        for i, facelets in enumerate(EDGE_FACELETS):
+            for k in range(2):
+                face, row, col = facelets[(k + self.eo[i]) % 2]
+                faces[face][row][col] = colors[EDGES[self.ep[i]][k]]
+        return faces
+
+    def multiply(self, other):
+        # Apply the permutation of other after this cube (in place)
+        self.co = [(self.co[j] + ori) % 3 for j, ori in zip(other.cp, other.co)]
+        self.cp = [self.cp[j] for j in other.cp]
+        self.eo = [(self.eo[j] + ori) % 2 for j, ori in zip(other.ep, other.eo)]
+        self.ep = [self.ep[j] for j in other.ep]
+
+    def move(self, move):
+        # Apply a face turn in RubiksCube.move notation
+        self.multiply(MOVE_CUBES[move])
+
+    def inverse(self):
+        cube = CubieCube()
+        for i, j in enumerate(self.cp):
+            cube.cp[j] = i
+            cube.co[j] = (-self.co[i]) % 3
+        for i, j in enumerate(self.ep):
+            cube.ep[j] = i
+            cube.eo[j] = self.eo[i]
+        return cube
+
+    def corner_parity(self):
+        return sum(1 for i in range(8) for j in range(i) if self.cp[j] > self.cp[i]) % 2
+
+    def edge_parity(self):
+        return sum(1 for i in range(12) for j in range(i) if self.ep[j] > self.ep[i]) % 2
+
+    def verify(self):
+        # Raise ValueError unless this is a reachable cube state
+        if sorted(self.cp) != list(range(8)) or sorted(self.ep) != list(range(12)):
+            raise ValueError("Invalid cube state: missing or duplicated cubies")
+        if sum(self.co) % 3 != 0:
+            raise ValueError("Invalid cube state: twisted corner")
+        if sum(self.eo) % 2 != 0:
+            raise ValueError("Invalid cube state: flipped edge")
+        if self.corner_parity() != self.edge_parity():
+            raise ValueError("Invalid cube state: parity error")
+
+    @property
+    def twist(self):
+        value = 0
+        for ori in self.co[:7]:
+            value = value * 3 + ori
+        return value
+
+    @twist.setter
+    def twist(self, value):
+        for i in range(6, -1, -1):
+            self.co[i] = value % 3
+            value //= 3
+        self.co[7] = -sum(self.co[:7]) % 3
+
+    @property
+    def flip(self):
+        value = 0
+        for ori in self.eo[:11]:
+            value = value * 2 + ori
+        return value
+
+    @flip.setter
+    def flip(self, value):
+        for i in range(10, -1, -1):
+            self.eo[i] = value % 2
+            value //= 2
+        self.eo[11] = sum(self.eo[:11]) % 2
+
+    @property
+    def slice(self):
+        # Combination index of the positions holding FR, FL, BL, BR; 0 when they are in the slice
+        value, found = 0, 0
+        for j in range(11, -1, -1):
+            if self.ep[j] >= 8:
+                found += 1
+                value += math.comb(11 - j, found)
+        return value
+
+    @slice.setter
+    def slice(self, value):
+        self.slice_sorted = value * 24
+
+    @property
+    def slice_sorted(self):
+        order = [edge - 8 for edge in self.ep if edge >= 8]
+        return self.slice * 24 + _perm_rank(order)
+
+    @slice_sorted.setter
+    def slice_sorted(self, value):
+        combination, order = divmod(value, 24)
+        slice_edges = [edge + 8 for edge in _perm_unrank(order, range(4))]
+        slots = []
+        remaining = 4
+        for j in range(12):
+            if remaining and combination >= math.comb(11 - j, remaining):
+                combination -= math.comb(11 - j, remaining)
+                remaining -= 1
+                slots.append(j)
+        others = iter(range(8))
+        slice_edges = iter(slice_edges)
+        self.ep = [next(slice_edges) if j in slots else next(others) for j in range(12)]
+
+    @property
+    def corners(self):
+        return _perm_rank(self.cp)
+
+    @corners.setter
+    def corners(self, value):
+        self.cp = _perm_unrank(value, range(8))
+
+    @property
+    def edges(self):
+        return _perm_rank(self.ep)
+
+    @edges.setter
+    def edges(self, value):
+        self.ep = _perm_unrank(value, range(12))
+
+    @property
+    def ud_edges(self):
+        return _perm_rank(self.ep[:8])
+
+    @ud_edges.setter
+    def ud_edges(self, value):
+        self.ep = _perm_unrank(value, range(8)) + [8, 9, 10, 11]
+
+    def key(self):
+        # Exact packed integer of the state (about 66 bits: the cube has more than 2**64 states)
+        return ((self.corners * 2187 + self.twist) * 479001600 + self.edges) * 2048 + self.flip
+
+# CubieCube of each face turn, derived from the sticker permutations
+MOVE_CUBES = {name: CubieCube.from_faces(state_to_faces(ArrayRubiksCube().state[perm]))
+              for name, perm in MOVE_PERMUTATIONS.items()}
+
+class RubiksCubeBatch:
+    """
+    N cube states stored as an (N, 54) uint8 array in the ArrayRubiksCube layout.
+    A move, or a whole move sequence, is applied to every state with a single
+    fancy-index op, so the cost scales with array width instead of Python calls.
+    """
+    def __init__(self, states):
+        self.states = np.array(states, dtype=np.uint8).reshape(-1, 54)
+
+    @classmethod
+    def solved(cls, count):
+        return cls(np.tile(np.repeat(np.arange(6, dtype=np.uint8), 9), (count, 1)))
+
+    @classmethod
+    def from_cubes(cls, cubes):
+        return cls([faces_to_state(cube.faces) for cube in cubes])
+
+    def __len__(self):
+        return len(self.states)
+
+    def __getitem__(self, index):
+        return ArrayRubiksCube(self.states[index])
+
+    def move(self, moves):
+        """
+        Apply one move ('R', "U'", 'F2') or a move sequence ("R U R' U'" or a list)
+        to every cube in the batch.
+        """
+        self.states = self.states[:, compile_algorithm(moves).permutation]
+
+    def is_solved(self):
+        # Boolean array, one entry per cube
+        stickers = self.states.reshape(-1, 6, 9)
+        return (stickers == stickers[:, :, :1]).all(axis=(1, 2))
+
+    def hash64(self):
+        # uint64 Zobrist hash of every cube, matching ArrayRubiksCube.hash64
+        return np.bitwise_xor.reduce(ZOBRIST_KEYS[STICKER_INDICES, self.states], axis=1)
+
+    def initialize_random(self, moves=100):
+        # Scramble every cube with its own random move sequence, never turning the same face twice in a row
+        count = len(self.states)
+        rows = np.arange(count)[:, None]
+        face = np.random.randint(6, size=count)
+        for _ in range(moves):
+            choice = face * 3 + np.random.randint(3, size=count)
+            self.states = self.states[rows, MOVE_PERMUTATION_TABLE[choice]]
+            face = (face + 1 + np.random.randint(5, size=count)) % 6
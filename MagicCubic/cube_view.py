@@ -0,0 +1,588 @@
+import pygame
+from pygame.locals import *
+from OpenGL.GL import *
+from OpenGL.GLU import *
+import sys
+import csv
+import json
+import time
+import argparse
+import functools
+from collections import deque
+import numpy as np
+from cube_model import (RubiksCube, FACE_ORDER, SOLVED_COLORS, FACELET_CUBELETS, FACELET_NORMALS,
+                        FACE_NORMALS, NOTATION_LAYERS, NOTATION_PERMUTATIONS, TURN_SUFFIX,
+                        faces_to_state, parse_move, expand_algorithm)
+
+# initialize Pygame and OpenGL
+pygame.init()
+
+# Constants
+LEFT = 1
+RIGHT = 3
+
+# Queued moves beyond this many are applied without animation so the view never lags behind
+MAX_ANIMATED_BACKLOG = 8
+
+# Camera: gluPerspective field of view (degrees) and distance from the cube center
+DISPLAY = (800, 600)
+FIELD_OF_VIEW = 45
+CAMERA_DISTANCE = 20
+
+# Cubelet geometry: centers 2 apart, each cubelet 1 wide
+CUBELET_SPACING = 2
+CUBELET_SIZE = 1
+CUBELET_CORNERS = np.array([(-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1),
+                            (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)]) * (CUBELET_SIZE / 2)
+CUBELET_EDGES = ((0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4),
+                 (0, 4), (1, 5), (2, 6), (3, 7))
+CUBELET_POSITIONS = [(x, y, z) for x in (-2, 0, 2) for y in (-2, 0, 2) for z in (-2, 0, 2)
+                     if (x, y, z) != (0, 0, 0)]
+
+def _sticker_vertices():
+    # 4 corners per sticker in the flat sticker order of cube_model, counter-clockwise
+    # seen from outside so that back faces can be culled
+    vertices = []
+    for cubelet, normal in zip(FACELET_CUBELETS, FACELET_NORMALS):
+        center = cubelet * CUBELET_SPACING + normal * (CUBELET_SIZE / 2)
+        u = np.roll(np.abs(normal), 1) * (CUBELET_SIZE / 2)
+        v = np.cross(normal, u)
+        vertices.extend(center + du * u + dv * v for du, dv in ((-1, -1), (1, -1), (1, 1), (-1, 1)))
+    return np.array(vertices, dtype=np.float32)
+
+def _edge_vertices():
+    # Both end points of the 12 edges of every visible cubelet, for GL_LINES
+    return np.array([np.add(position, CUBELET_CORNERS[i]) for position in CUBELET_POSITIONS
+                     for edge in CUBELET_EDGES for i in edge], dtype=np.float32)
+
+STICKER_VERTICES = _sticker_vertices()
+EDGE_VERTICES = _edge_vertices()
+# Picking data per sticker: center, outward normal and the two half-edge vectors of its quad
+_quads = STICKER_VERTICES.reshape(54, 4, 3).astype(np.float64)
+STICKER_CENTERS = _quads.mean(axis=1)
+STICKER_NORMALS = FACELET_NORMALS.astype(np.float64)
+STICKER_AXES = np.stack([(_quads[:, 1] - _quads[:, 0]) / 2, (_quads[:, 3] - _quads[:, 0]) / 2], axis=1)
+STICKER_AXIS_LENGTHS = np.einsum('ikj,ikj->ik', STICKER_AXES, STICKER_AXES)
+# Bytes of color data per sticker: 4 vertices of 3 float32
+STICKER_COLOR_BYTES = 4 * 3 * 4
+
+@functools.lru_cache(maxsize=None)
+def moved_sticker_runs(move):
+    # (start, stop) runs of consecutive sticker indices whose color a move changes
+    # (20 for a face turn: 8 on the face itself and 12 around it)
+    moved = np.flatnonzero(NOTATION_PERMUTATIONS[move] != np.arange(54)).tolist()
+    runs = []
+    for i in moved:
+        if runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return tuple(map(tuple, runs))
+
+@functools.lru_cache(maxsize=None)
+def layer_indices(base):
+    """
+    Vertex indices for drawing the cubelets a base move ('U', 'Rw', 'M', 'x', ...) turns
+    and the cubelets it leaves alone, as uint32 arrays:
+    (turning sticker quads, still sticker quads, turning edge lines, still edge lines).
+    """
+    face, layers = NOTATION_LAYERS.get(base, (base, (1,)))
+    axis = FACE_NORMALS[face]
+    stickers = np.isin(FACELET_CUBELETS @ axis, layers)
+    cubelets = np.isin(np.array(CUBELET_POSITIONS) @ axis // CUBELET_SPACING, layers)
+    quads = np.arange(len(STICKER_VERTICES), dtype=np.uint32).reshape(54, -1)
+    edges = np.arange(len(EDGE_VERTICES), dtype=np.uint32).reshape(len(CUBELET_POSITIONS), -1)
+    return (quads[stickers].ravel(), quads[~stickers].ravel(),
+            edges[cubelets].ravel(), edges[~cubelets].ravel())
+
+def _rotation(angle, axis):
+    # Matrix of glRotatef(angle, *axis) for a coordinate axis
+    c, s = np.cos(np.radians(angle)), np.sin(np.radians(angle))
+    x, y, z = axis
+    return np.array([[c + x * x * (1 - c), x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+                     [y * x * (1 - c) + z * s, c + y * y * (1 - c), y * z * (1 - c) - x * s],
+                     [z * x * (1 - c) - y * s, z * y * (1 - c) + x * s, c + z * z * (1 - c)]])
+
+def mouse_ray(mouse, rot_x, rot_y, display=DISPLAY):
+    """
+    Origin and direction, in cube coordinates, of the ray through a window pixel.
+    Inverts the view set up in RubiksCube3D: gluPerspective(FIELD_OF_VIEW), a translation
+    by -CAMERA_DISTANCE along z, then glRotatef(rot_x) about x and glRotatef(rot_y) about y.
+    """
+    width, height = display
+    tangent = np.tan(np.radians(FIELD_OF_VIEW) / 2)
+    direction = np.array([(2 * mouse[0] / width - 1) * tangent * width / height,
+                          (1 - 2 * mouse[1] / height) * tangent, -1.0])
+    # Eye -> cube coordinates: undo the translation, then both rotations
+    to_cube = (_rotation(rot_x, (1, 0, 0)) @ _rotation(rot_y, (0, 1, 0))).T
+    return to_cube @ np.array([0.0, 0.0, CAMERA_DISTANCE]), to_cube @ direction
+
+def pick_sticker(origin, direction):
+    # Flat index of the nearest sticker quad the ray hits on its front side, or None
+    facing = STICKER_NORMALS @ direction
+    with np.errstate(divide='ignore', invalid='ignore'):
+        distance = np.einsum('ij,ij->i', STICKER_CENTERS - origin, STICKER_NORMALS) / facing
+    offset = origin + distance[:, None] * direction - STICKER_CENTERS
+    # Quad coordinates of the hit point along both half-edge vectors, inside while within [-1, 1]
+    local = np.einsum('ij,ikj->ik', offset, STICKER_AXES) / STICKER_AXIS_LENGTHS
+    hit = (facing < 0) & (distance > 0) & (np.abs(local) <= 1).all(axis=1)
+    if not hit.any():
+        return None
+    return int(np.flatnonzero(hit)[np.argmin(distance[hit])])
+
+class FrameStats:
+    """
+    Milliseconds spent per frame in each phase of RubiksCube3D.run.
+    A rolling window of frame totals gives the p50/p95/p99 shown by the HUD; with trace=True
+    every frame is also kept for export with save().
+    """
+    PHASES = ('events', 'animate', 'draw', 'hud', 'flip')
+
+    def __init__(self, window=240, trace=False):
+        self.totals = deque(maxlen=window)
+        self.frames = [] if trace else None
+        self.count = 0
+        self.last = dict.fromkeys(self.PHASES, 0.0)
+        self.start = time.perf_counter()
+
+    def add(self, timings):
+        # timings: {phase: milliseconds}
+        total = sum(timings.values())
+        self.totals.append(total)
+        self.last = timings
+        if self.frames is not None:
+            self.frames.append({'frame': self.count, 'time': round(time.perf_counter() - self.start, 6),
+                                **{phase: round(timings[phase], 4) for phase in self.PHASES},
+                                'total': round(total, 4)})
+        self.count += 1
+
+    def percentiles(self):
+        # (p50, p95, p99) of the frame totals in the window
+        if not self.totals:
+            return (0.0, 0.0, 0.0)
+        return tuple(np.percentile(np.fromiter(self.totals, dtype=float), (50, 95, 99)).tolist())
+
+    def save(self, path):
+        # Trace as CSV (by extension) or JSON: one record per drawn frame
+        fields = ['frame', 'time', *self.PHASES, 'total']
+        with open(path, 'w', newline='') as f:
+            if path.lower().endswith('.csv'):
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(self.frames or [])
+            else:
+                json.dump({'unit': 'ms', 'fields': fields, 'frames': self.frames or []}, f, indent=1)
+
+# 3D Rendering and Interaction
+class RubiksCube3D:
+    def __init__(self, show_hud=False, trace_path=None):
+        try:
+            # window setup
+            display = DISPLAY
+            pygame.display.set_mode(display, DOUBLEBUF | OPENGL)
+            
+            # OpenGL setup (mouse_ray inverts this view for picking)
+            gluPerspective(FIELD_OF_VIEW, (display[0] / display[1]), 0.1, 50.0)
+            glTranslatef(0.0, 0.0, -CAMERA_DISTANCE)
+            glEnable(GL_DEPTH_TEST)
+            glEnable(GL_CULL_FACE)
+            glCullFace(GL_BACK)
+            glFrontFace(GL_CCW)
+            glEnable(GL_COLOR_MATERIAL)
+            glEnable(GL_NORMALIZE)
+            glShadeModel(GL_SMOOTH)
+            print("Pygame 和 OpenGL 初始化成功。")
+
+            self.cube = RubiksCube()
+            self.cube.initialize_random(moves=100)
+            print("魔術方塊初始化並已打亂。")
+
+            # Rotation angles
+            self.rot_x = 30
+            self.rot_y = -30
+
+            # Mouse control
+            self.mouse_down = False
+            self.last_mouse_pos = (0, 0)
+
+            # Animation: moves wait in move_queue and are animated one at a time
+            self.move_queue = deque()
+            self.animating = False
+            self.animation_move = None
+            self.animation_base = None
+            self.animation_turns = 0  # quarter turns, negative for counter-clockwise
+            self.animation_angle = 0
+            self.animation_speed = 360  # degrees per second, independent of the frame rate
+            self.animation_rate = self.animation_speed  # speed of the current animation
+            self.animation_start = 0.0
+
+            # Set whenever the picture changes; the loop only draws a frame when it is set
+            self.dirty = True
+
+            # Frame-time instrumentation: HUD toggled with H, trace written on exit
+            self.stats = FrameStats(trace=trace_path is not None)
+            self.trace_path = trace_path
+            self.show_hud = show_hud
+            self.hud_font = pygame.font.Font(None, 20)
+            self.hud_images = []
+            self.hud_updated = 0.0
+
+            # Mode: 'cube_rotation' or 'side_rotation'
+            self.mode = 'cube_rotation'
+            self.selected_face = None  # To store which face is selected in side_rotation mode
+            self.selected_sticker = None  # (row, column) of the clicked sticker on selected_face
+
+            # Vertex buffers: geometry is uploaded once, only the sticker colors change
+            self.create_buffers()
+
+        except Exception as e:
+            print(f"初始化錯誤: {e}")
+            pygame.quit()
+            sys.exit()
+
+    def color_map(self, color_char):
+        # Map the color character to RGB values
+        mapping = {
+            'W': (1, 1, 1),       # White
+            'Y': (1, 1, 0),       # Yellow
+            'G': (0, 1, 0),       # Green
+            'B': (0, 0, 1),       # Blue
+            'O': (1, 0.5, 0),     # Orange
+            'R': (1, 0, 0)        # Red
+        }
+        return mapping.get(color_char, (0, 0, 0))  # Default to black if unknown
+
+    def create_buffers(self):
+        # Static buffers for the 54 sticker quads and the cubelet edges, dynamic ones for colors
+        self.sticker_vbo, self.edge_vbo, self.color_vbo = glGenBuffers(3)
+        glBindBuffer(GL_ARRAY_BUFFER, self.sticker_vbo)
+        glBufferData(GL_ARRAY_BUFFER, STICKER_VERTICES.nbytes, STICKER_VERTICES, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, self.edge_vbo)
+        glBufferData(GL_ARRAY_BUFFER, EDGE_VERTICES.nbytes, EDGE_VERTICES, GL_STATIC_DRAW)
+        self.color_rgb = np.array([self.color_map(color) for color in SOLVED_COLORS], dtype=np.float32)
+        # Color code of every sticker, in the flat order of the buffers (faces_to_state layout)
+        self.sticker_codes = faces_to_state(self.cube.faces)
+        colors = self.sticker_colors()
+        glBindBuffer(GL_ARRAY_BUFFER, self.color_vbo)
+        glBufferData(GL_ARRAY_BUFFER, colors.nbytes, colors, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        # Element buffers per animated base move, created when that move is first animated
+        self.layer_buffers = {}
+
+    def get_layer_buffers(self, base):
+        # [(element buffer, index count)] in the order of layer_indices(base)
+        if base not in self.layer_buffers:
+            buffers = []
+            for indices in layer_indices(base):
+                buffer = glGenBuffers(1)
+                glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, buffer)
+                glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+                buffers.append((buffer, len(indices)))
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+            self.layer_buffers[base] = buffers
+        return self.layer_buffers[base]
+
+    def sticker_colors(self, start=0, stop=54):
+        # RGB of every vertex of stickers start..stop-1
+        return np.repeat(self.color_rgb[self.sticker_codes[start:stop]], 4, axis=0)
+
+    def update_colors(self):
+        # Re-read every sticker from self.cube and upload all colors (after the state was replaced)
+        self.sticker_codes = faces_to_state(self.cube.faces)
+        colors = self.sticker_colors()
+        glBindBuffer(GL_ARRAY_BUFFER, self.color_vbo)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, colors.nbytes, colors)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def update_move_colors(self, move):
+        # Follow a move through the sticker permutation and upload only the stickers it changed
+        self.sticker_codes = self.sticker_codes[NOTATION_PERMUTATIONS[move]]
+        glBindBuffer(GL_ARRAY_BUFFER, self.color_vbo)
+        for start, stop in moved_sticker_runs(move):
+            colors = self.sticker_colors(start, stop)
+            glBufferSubData(GL_ARRAY_BUFFER, start * STICKER_COLOR_BYTES, colors.nbytes, colors)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw_elements(self, mode, part, count):
+        # part is None for all count vertices, else an (element buffer, index count) pair
+        if part is None:
+            glDrawArrays(mode, 0, count)
+        elif part[1]:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, part[0])
+            glDrawElements(mode, part[1], GL_UNSIGNED_INT, None)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def draw_parts(self, stickers=None, edges=None):
+        # Sticker quads with their colors, then black cubelet edges
+        glEnableClientState(GL_COLOR_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, self.sticker_vbo)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, self.color_vbo)
+        glColorPointer(3, GL_FLOAT, 0, None)
+        self.draw_elements(GL_QUADS, stickers, len(STICKER_VERTICES))
+        glDisableClientState(GL_COLOR_ARRAY)
+
+        glColor3f(0, 0, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, self.edge_vbo)
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        self.draw_elements(GL_LINES, edges, len(EDGE_VERTICES))
+
+    def draw_cube(self, angle=0):
+        # Two glDrawArrays calls when nothing turns; during a turn the still cubelets are drawn
+        # as they are and only the cubelets of the turning layer are rotated by angle
+        try:
+            glEnableClientState(GL_VERTEX_ARRAY)
+            if self.animating:
+                buffers = self.get_layer_buffers(self.animation_base)
+                turning_stickers, still_stickers, turning_edges, still_edges = buffers
+                self.draw_parts(still_stickers, still_edges)
+                face = NOTATION_LAYERS.get(self.animation_base, (self.animation_base,))[0]
+                glPushMatrix()
+                glRotatef(angle, *FACE_NORMALS[face].tolist())
+                self.draw_parts(turning_stickers, turning_edges)
+                glPopMatrix()
+            else:
+                self.draw_parts()
+            glDisableClientState(GL_VERTEX_ARRAY)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+        except Exception as e:
+            print(f"draw_cube 錯誤: {e}")
+
+    def apply_move(self, move):
+        # Perform the move on the data structure and upload the stickers it changed
+        self.cube.move(move)
+        self.update_move_colors(move)
+        self.dirty = True
+
+    def handle_events(self, wait=False):
+        # With wait=True (nothing to draw) sleep until the next event instead of polling.
+        # Returns the seconds spent asleep, which are not part of any frame.
+        waited = 0.0
+        events = pygame.event.get()
+        if wait and not events:
+            start = time.perf_counter()
+            events = [pygame.event.wait()]
+            waited = time.perf_counter() - start
+        for event in events:
+            if event.type == pygame.QUIT:
+                print("退出程式。")
+                pygame.quit()
+                sys.exit()
+
+            elif event.type == MOUSEBUTTONDOWN:
+                if self.mode == 'cube_rotation':
+                    if event.button == LEFT:
+                        # Start rotating the cube
+                        self.mouse_down = True
+                        self.last_mouse_pos = pygame.mouse.get_pos()
+
+                        # In cube_rotation mode, detect face click
+                        # Start selection process
+                        face = self.detect_face_under_mouse(event.pos)
+                        if face:
+                            print(f"選擇面：{face} {self.selected_sticker}")
+                            self.mode = 'side_rotation'
+                            self.selected_face = face
+
+                elif self.mode == 'side_rotation':
+                    if event.button == LEFT:
+                        # Left-click: 90 degrees counter-clockwise (queued while another turn runs)
+                        print("左鍵點擊：逆時針旋轉選定面。")
+                        self.start_animation(self.selected_face, clockwise=False)
+                    elif event.button == RIGHT:
+                        # Right-click: 90 degrees clockwise
+                        print("右鍵點擊：順時針旋轉選定面。")
+                        self.start_animation(self.selected_face, clockwise=True)
+            
+            elif event.type == MOUSEBUTTONUP:
+                if self.mode == 'cube_rotation':
+                    if event.button == 1:
+                        # Stop rotating the cube
+                        self.mouse_down = False
+            
+            elif event.type == MOUSEMOTION:
+                if self.mode == 'cube_rotation' and self.mouse_down:
+                    # Rotate the entire cube based on mouse movement
+                    x, y = pygame.mouse.get_pos()
+                    dx, dy = pygame.mouse.get_rel()
+                    self.rot_x += dy
+                    self.rot_y += dx
+                    self.dirty = True
+
+            elif event.type in (VIDEOEXPOSE, WINDOWEXPOSED):
+                # The window contents were lost and have to be drawn again
+                self.dirty = True
+
+            elif event.type == KEYDOWN:
+                if self.mode == 'side_rotation' and event.key == K_ESCAPE:
+                    # Return to cube_rotation mode
+                    print("按下 Esc 鍵：返回立方體旋轉模式。")
+                    self.mode = 'cube_rotation'
+                    self.selected_face = None
+                elif event.key == K_h:
+                    self.show_hud = not self.show_hud
+                    self.dirty = True
+        return waited
+
+    def detect_face_under_mouse(self, mouse=None):
+        # Cast the mouse ray against the sticker quads on the CPU: no extra frame, no glReadPixels.
+        # Returns the face ('U', ...) and stores the sticker's (row, column) in self.selected_sticker.
+        origin, direction = mouse_ray(mouse or pygame.mouse.get_pos(), self.rot_x, self.rot_y)
+        sticker = pick_sticker(origin, direction)
+        if sticker is None:
+            return None  # No face detected
+        self.selected_sticker = divmod(sticker % 9, 3)
+        return FACE_ORDER[sticker // 9]
+
+    def start_animation(self, face, clockwise=True):
+        if face not in FACE_ORDER:
+            print(f"無效的面：{face}")
+            return
+        self.queue_move(face if clockwise else face + "'")
+
+    def play(self, moves):
+        # Queue a whole sequence, e.g. a scramble or a solution: "R U R' U'", "(R U)3 x M2"
+        for move in expand_algorithm(moves):
+            self.queue_move(move)
+
+    def queue_move(self, move):
+        # Moves are never dropped: they wait here until the running animation is done.
+        # A turn of the same layer as the last queued move is merged into it (U U -> U2, U U' -> nothing).
+        if self.move_queue:
+            base, turns = parse_move(move)
+            last_base, last_turns = parse_move(self.move_queue[-1])
+            if base == last_base:
+                self.move_queue.pop()
+                turns = (turns + last_turns) % 4
+                if turns:
+                    self.move_queue.append(base + TURN_SUFFIX[turns])
+                return
+        self.move_queue.append(move)
+        if not self.animating:
+            self.next_animation(time.perf_counter())
+
+    def next_animation(self, now):
+        # Far behind: apply the oldest moves at once and animate only the last few
+        while len(self.move_queue) > MAX_ANIMATED_BACKLOG:
+            self.apply_move(self.move_queue.popleft())
+        if not self.move_queue:
+            self.animating = False
+            return
+        move = self.move_queue.popleft()
+        base, turns = parse_move(move)
+        self.animating = True
+        self.animation_move = move
+        self.animation_base = base
+        self.animation_turns = -1 if turns == 3 else turns
+        self.animation_angle = 0
+        # Every move still waiting makes this one faster
+        self.animation_rate = self.animation_speed * (1 + len(self.move_queue))
+        self.animation_start = now
+        self.dirty = True
+        print(f"開始動畫：{move}")
+
+    def animate_rotation(self, now=None):
+        # Angle to draw the turning layer at, from the time elapsed since the animation started,
+        # so a slow or dropped frame never slows the animation down
+        if self.animating:
+            now = time.perf_counter() if now is None else now
+            progress = self.animation_rate * (now - self.animation_start)
+            self.dirty = True
+            if progress >= 90 * abs(self.animation_turns):
+                # Apply the rotation to the data structure and go on with the next queued move
+                self.apply_move(self.animation_move)
+                self.animating = False
+                self.animation_angle = 0
+                print("動畫結束，應用旋轉到數據結構。")
+                self.next_animation(now)
+                return 0
+            # Clockwise as seen from the turning face is negative about its outward axis
+            self.animation_angle = -progress if self.animation_turns > 0 else progress
+            return self.animation_angle
+        return 0
+
+    def hud_lines(self):
+        p50, p95, p99 = self.stats.percentiles()
+        last = self.stats.last
+        return [f"frame p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f} ms  ({len(self.stats.totals)} frames)",
+                '  '.join(f"{phase} {last[phase]:.2f}" for phase in FrameStats.PHASES)]
+
+    def draw_hud(self):
+        # Text overlay written straight into the framebuffer at the top left corner.
+        # The text is rendered again at most 4 times a second.
+        now = time.perf_counter()
+        if now - self.hud_updated > 0.25:
+            self.hud_updated = now
+            self.hud_images = []
+            for line in self.hud_lines():
+                surface = self.hud_font.render(line, True, (255, 255, 255), (0, 0, 0))
+                self.hud_images.append((surface.get_width(), surface.get_height(),
+                                        pygame.image.tostring(surface, 'RGBA', True)))
+        glDisable(GL_DEPTH_TEST)
+        y = DISPLAY[1] - 4
+        for width, height, pixels in self.hud_images:
+            y -= height
+            glWindowPos2d(4, y)
+            glDrawPixels(width, height, GL_RGBA, GL_UNSIGNED_BYTE, pixels)
+        glEnable(GL_DEPTH_TEST)
+
+    def run(self):
+        try:
+            self.loop()
+        finally:
+            if self.trace_path:
+                self.stats.save(self.trace_path)
+                print(f"Frame trace ({self.stats.count} frames) written to {self.trace_path}")
+
+    def loop(self):
+        clock = pygame.time.Clock()
+        print("進入主迴圈。")
+        while True:
+            # Idle: block on the event queue, so no CPU is spent while nothing changes
+            start = time.perf_counter()
+            waited = self.handle_events(wait=not (self.dirty or self.animating))
+            events_done = time.perf_counter()
+            angle = self.animate_rotation()
+            animate_done = time.perf_counter()
+            if not self.dirty:
+                continue
+
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+            glPushMatrix()
+            glRotatef(self.rot_x, 1, 0, 0)
+            glRotatef(self.rot_y, 0, 1, 0)
+            self.draw_cube(angle)
+            glPopMatrix()
+            draw_done = time.perf_counter()
+            if self.show_hud:
+                self.draw_hud()
+            hud_done = time.perf_counter()
+
+            pygame.display.flip()
+            flip_done = time.perf_counter()
+            self.dirty = False
+            self.stats.add({'events': (events_done - start - waited) * 1000,
+                            'animate': (animate_done - events_done) * 1000,
+                            'draw': (draw_done - animate_done) * 1000,
+                            'hud': (hud_done - draw_done) * 1000,
+                            'flip': (flip_done - hud_done) * 1000})
+            # Caps the frame rate while dragging or animating
+            clock.tick(60)
+
+# Main Execution
+def main():
+    parser = argparse.ArgumentParser(description="3D Rubik's Cube viewer")
+    parser.add_argument('--hud', action='store_true', help="show frame-time percentiles (toggle with H)")
+    parser.add_argument('--trace', help="write per-frame phase timings to this .json or .csv file on exit")
+    args = parser.parse_args()
+    try:
+        rubiks_cube_3d = RubiksCube3D(show_hud=args.hud, trace_path=args.trace)
+        rubiks_cube_3d.run()
+    except Exception as e:
+        print(f"程式運行時出錯: {e}")
+        pygame.quit()
+        sys.exit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+NxN cube (2x2 up to 10x10 and beyond) on NumPy arrays.
+
+Each face is an N x N array of color codes. A face turn moves N stickers on each of
+the four neighbouring faces through row/column views, so a layer turn costs O(N).
+The turned face itself is not copied either: every face keeps a count of pending
+clockwise quarter turns and is read through np.rot90, which is a strided view.
+
+Notation (layers are counted from the named face, starting at 1):
+    R, R', R2       outer layer
+    2R, 3R'         a single inner layer (2R on a 3x3 is M')
+    Rw, 3Rw2, r     wide turns: the outer 2 (or the given number of) layers; r == Rw
+    x, y, z         whole-cube rotations along R, U and F
+
+Usage:
+    python nxn_cube.py 5 "Rw U2 3R' x F"
+"""
+import re
+import sys
+import numpy as np
+from cube_model import RubiksCube, FACE_ORDER, SOLVED_COLORS, OPPOSITE_FACE, QUARTER_TURNS
+
+ROTATIONS = {'x': 'R', 'y': 'U', 'z': 'F'}
+MOVE_PATTERN = re.compile(r"^(\d*)([UDFBLR])(w?)(['2]?)$")
+
+class NxNCube:
+    """
+    N x N x N cube in the RubiksCube face layout and orientation conventions
+    (same ADJACENT table, with row/column 0 or 2 read as layer d from that edge).
+    """
+    def __init__(self, n=3):
+        if n < 2:
+            raise ValueError("A cube needs at least 2 layers")
+        self.n = n
+        self._stickers = {face: np.full((n, n), code, dtype=np.uint8) for code, face in enumerate(FACE_ORDER)}
+        # Clockwise quarter turns of each face that are not applied to its array yet
+        self._turns = dict.fromkeys(FACE_ORDER, 0)
+
+    def face(self, face):
+        # Current N x N view of a face (row 0 on top, as in RubiksCube.faces)
+        return np.rot90(self._stickers[face], -self._turns[face])
+
+    @property
+    def faces(self):
+        return {face: self.face(face) for face in FACE_ORDER}
+
+    def to_faces(self):
+        # Nested lists of color letters, like RubiksCube.faces
+        return {face: [[SOLVED_COLORS[code] for code in row] for row in self.face(face).tolist()]
+                for face in FACE_ORDER}
+
+    def to_state(self):
+        # Flat copy of all stickers, face-major in FACE_ORDER (the ArrayRubiksCube layout for n == 3)
+        return np.concatenate([self.face(face).ravel() for face in FACE_ORDER])
+
+    def _strip(self, face_info, depth):
+        # View of the N stickers a turn at the given depth takes from one neighbouring face
+        face, idx, typ, reverse = face_info
+        line = depth if idx == 0 else self.n - 1 - depth
+        view = self.face(face)
+        strip = view[line] if typ == 'row' else view[:, line]
+        return strip[::-1] if reverse else strip
+
+    def turn(self, face, start=0, stop=1, quarter_turns=1):
+        """
+        Turn the layers start..stop-1 (0 is the outer layer of face) by quarter_turns
+        clockwise quarter turns, as seen from face.
+        """
+        if not 0 <= start < stop <= self.n:
+            raise ValueError(f"Invalid layers {start}..{stop - 1} for a {self.n}x{self.n} cube")
+        quarter_turns %= 4
+        if quarter_turns == 0:
+            return
+        if start == 0:
+            self._turns[face] = (self._turns[face] + quarter_turns) % 4
+        if stop == self.n:
+            # The far layer is the opposite face, which turns the other way as seen from itself
+            opposite = OPPOSITE_FACE[face]
+            self._turns[opposite] = (self._turns[opposite] - quarter_turns) % 4
+        adj = RubiksCube.ADJACENT[face]
+        for depth in range(start, stop):
+            strips = [self._strip(info, depth) for info in adj]
+            if quarter_turns == 2:
+                for a, b in ((0, 2), (1, 3)):
+                    temp = strips[a].copy()
+                    strips[a][:] = strips[b]
+                    strips[b][:] = temp
+            elif quarter_turns == 1:
+                temp = strips[3].copy()
+                for i in range(3, 0, -1):
+                    strips[i][:] = strips[i - 1]
+                strips[0][:] = temp
+            else:
+                temp = strips[0].copy()
+                for i in range(3):
+                    strips[i][:] = strips[i + 1]
+                strips[3][:] = temp
+
+    def move(self, move):
+        """
+        Perform one move in the notation above, e.g. 'R', "3Rw'", '2U2', 'r', 'x'.
+        Raises ValueError for an unknown move or a layer the cube does not have.
+        """
+        if move[:1] in ROTATIONS and move[1:] in QUARTER_TURNS:
+            self.turn(ROTATIONS[move[0]], 0, self.n, QUARTER_TURNS[move[1:]])
+            return
+        if move[:1] and move[0] in 'udfblr' and move[1:] in QUARTER_TURNS:
+            move = move[0].upper() + 'w' + move[1:]
+        match = MOVE_PATTERN.match(move)
+        if not match:
+            raise ValueError(f"Invalid move: {move!r}")
+        layers, face, wide, suffix = match.groups()
+        layers = int(layers) if layers else (2 if wide else 1)
+        if layers < 1 or layers > self.n:
+            raise ValueError(f"Invalid move for a {self.n}x{self.n} cube: {move!r}")
+        start = 0 if wide else layers - 1
+        self.turn(face, start, layers, QUARTER_TURNS[suffix])
+
+    def apply_algorithm(self, moves):
+        if isinstance(moves, str):
+            moves = moves.split()
+        for move in moves:
+            self.move(move)
+
+    def is_solved(self):
+        # Rotations of a face do not change whether it is one color, so the raw arrays suffice
+        return all((stickers == stickers[0, 0]).all() for stickers in self._stickers.values())
+
+    def copy(self):
+        cube = self.__class__.__new__(self.__class__)
+        cube.n = self.n
+        cube._stickers = {face: stickers.copy() for face, stickers in self._stickers.items()}
+        cube._turns = dict(self._turns)
+        return cube
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    cube = NxNCube(size)
+    cube.apply_algorithm(sys.argv[2] if len(sys.argv) > 2 else "Rw U2 2R' F")
+    for name in FACE_ORDER:
+        print(name)
+        for row in cube.to_faces()[name]:
+            print('  ' + ' '.join(row))
+    print("Solved:", cube.is_solved())
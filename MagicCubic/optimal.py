@@ -0,0 +1,131 @@
+"""
+Optimal (face-turn metric) IDA* solver for RubiksCube.
+
+The search state is a handful of integer coordinates (corner permutation, twist and
+the position/flip coordinates of each edge group). They live in slots preallocated per
+search depth and are updated through the move tables, so expanding a node never copies
+or allocates a cube. The heuristic is the maximum over the corner pattern database and
+the edge-group pattern databases from pattern_db.py, which is admissible, so the first
+solution IDA* finds is a shortest one.
+
+Usage:
+    python optimal.py "R U F' L2 D"
+"""
+import sys
+import time
+from collections import namedtuple
+import pattern_db
+from cube_model import RubiksCube, MOVE_NAMES
+from solver import to_cubie, _flat, ALLOWED_MOVES
+
+# Korf's split of the edges into two groups of six
+DEFAULT_EDGE_GROUPS = ((0, 1, 2, 3, 4, 5), (6, 7, 8, 9, 10, 11))
+
+OptimalSolution = namedtuple('OptimalSolution', ['moves', 'length', 'nodes', 'seconds', 'nodes_per_second'])
+
+class OptimalSolver:
+    """
+    Loads (or builds once, see pattern_db.load) the corner database and one database
+    per edge group, then finds shortest solutions with IDA*.
+    The edge groups must track at least 11 edges so that a zero heuristic means solved.
+    """
+    def __init__(self, edge_groups=DEFAULT_EDGE_GROUPS, table_dir=None, processes=None):
+        if len(set().union(*edge_groups)) < 11:
+            raise ValueError("Edge groups must cover at least 11 edges")
+        corner_pattern = pattern_db.CornerPattern(table_dir)
+        self.patterns = [corner_pattern] + [pattern_db.EdgePattern(edges, table_dir) for edges in edge_groups]
+        self.databases = [pattern_db.load(pattern, table_dir, processes) for pattern in self.patterns]
+        self.corner_db = memoryview(self.databases[0].table)
+        self.corners_move = _flat(corner_pattern.corners_move)
+        self.twist_move = _flat(corner_pattern.twist_move)
+        self.edge_dbs = [memoryview(db.table) for db in self.databases[1:]]
+        self.position_moves = [_flat(pattern.position_move) for pattern in self.patterns[1:]]
+        self.flip_moves = [_flat(pattern.flip_move) for pattern in self.patterns[1:]]
+        self.shifts = [pattern.k for pattern in self.patterns[1:]]
+        self.edge_groups = tuple(zip(range(len(self.edge_dbs)), self.position_moves, self.flip_moves,
+                                     self.edge_dbs, self.shifts))
+        self.nodes = 0
+
+    def heuristic(self, cube):
+        # Admissible lower bound on the solution length
+        cubie = to_cubie(cube)
+        return max(db.distance_of(cubie) for db in self.databases)
+
+    def solve(self, cube, max_length=20):
+        """
+        Return an OptimalSolution whose moves string is a shortest solution of cube,
+        together with the number of expanded nodes and the search speed.
+        Raises ValueError for an impossible state or when no solution has at most max_length moves.
+        """
+        cubie = to_cubie(cube)
+        cubie.verify()
+        groups = len(self.edge_dbs)
+        # Search state per depth; slot 0 holds the scrambled cube
+        self._corners = [0] * (max_length + 1)
+        self._twist = [0] * (max_length + 1)
+        self._positions = [[0] * groups for _ in range(max_length + 1)]
+        self._flips = [[0] * groups for _ in range(max_length + 1)]
+        self._path = [0] * max_length
+        self._corners[0], self._twist[0] = cubie.corners, cubie.twist
+        for g, pattern in enumerate(self.patterns[1:]):
+            index = pattern.index_of(cubie)
+            self._positions[0][g] = index >> pattern.k
+            self._flips[0][g] = index & ((1 << pattern.k) - 1)
+
+        self.nodes = 0
+        start = time.perf_counter()
+        bound = self.heuristic(cubie)
+        while bound <= max_length:
+            if bound == 0 or self._search(0, bound, 6):
+                seconds = time.perf_counter() - start
+                return OptimalSolution(' '.join(MOVE_NAMES[m] for m in self._path[:bound]), bound,
+                                       self.nodes, seconds, self.nodes / seconds if seconds else 0.0)
+            bound += 1
+        raise ValueError(f"No solution of at most {max_length} moves")
+
+    def _search(self, depth, bound, last_face):
+        # Expand the node stored in slot depth; children are written into slot depth + 1
+        self.nodes += 1
+        togo = bound - depth
+        corners, twist = self._corners[depth], self._twist[depth]
+        positions, flips = self._positions[depth], self._flips[depth]
+        next_positions, next_flips = self._positions[depth + 1], self._flips[depth + 1]
+        corners_move, twist_move, corner_db = self.corners_move, self.twist_move, self.corner_db
+        groups = self.edge_groups
+        for m in ALLOWED_MOVES[last_face]:
+            new_corners = corners_move[corners * 18 + m]
+            new_twist = twist_move[twist * 18 + m]
+            index = new_corners * 2187 + new_twist
+            packed = corner_db[index >> 1]
+            if (packed >> 4 if index & 1 else packed & 0xF) >= togo:
+                continue
+            for g, position_move, flip_move, edge_db, shift in groups:
+                row = positions[g] * 18 + m
+                position = position_move[row]
+                flip = flips[g] ^ flip_move[row]
+                index = (position << shift) | flip
+                packed = edge_db[index >> 1]
+                if (packed >> 4 if index & 1 else packed & 0xF) >= togo:
+                    break
+                next_positions[g] = position
+                next_flips[g] = flip
+            else:
+                self._path[depth] = m
+                # Every database reads 0 at depth + 1 == bound, which means the cube is solved
+                if togo == 1:
+                    return True
+                self._corners[depth + 1] = new_corners
+                self._twist[depth + 1] = new_twist
+                if self._search(depth + 1, bound, m // 3):
+                    return True
+        return False
+
+if __name__ == "__main__":
+    cube = RubiksCube()
+    scramble = sys.argv[1] if len(sys.argv) > 1 else "R U F' L2 D B"
+    for move in scramble.split():
+        cube.move(move)
+    solver = OptimalSolver()
+    result = solver.solve(cube)
+    print(f"Optimal solution ({result.length} moves): {result.moves}")
+    print(f"{result.nodes:,} nodes in {result.seconds:.3f} s ({result.nodes_per_second:,.0f} nodes/s)")
@@ -0,0 +1,264 @@
+"""
+Breadth-first pattern databases for the cube.
+
+A pattern database stores, for every state of a pattern (all 8 corners, or a subset
+of the edges), the number of face turns needed to solve that pattern. Distances are
+packed 4 bits per entry into a memory-mapped file (0xF marks an entry not reached yet),
+so a corner database of 88,179,840 entries takes 42 MB and can be opened read-only
+by any number of processes.
+
+The patterns move through the CubieCube move tables, which are derived from
+RubiksCube._perform_move, so the distances follow exactly the same move semantics.
+Each BFS level is split into index ranges that a multiprocessing pool expands in parallel.
+
+Usage:
+    python pattern_db.py corners
+    python pattern_db.py edges 0 1 2 3 4 5 --processes 8
+"""
+import os
+import sys
+import math
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import tables
+from cube_model import EDGES
+
+UNKNOWN = 0xF
+
+class CornerPattern:
+    """Corner permutation and twist: index = corners * 2187 + twist."""
+    size = tables.N_CORNERS * tables.N_TWIST
+    solved_index = 0
+
+    def __init__(self, table_dir=None):
+        self.table_dir = table_dir
+        self.name = 'corners'
+        self.corners_move = np.asarray(tables.corners_move(table_dir))
+        self.twist_move = np.asarray(tables.twist_move(table_dir))
+
+    def spec(self):
+        # Picklable description used to rebuild the pattern inside worker processes
+        return ('corners', None, self.table_dir)
+
+    def index_of(self, cubie):
+        return cubie.corners * tables.N_TWIST + cubie.twist
+
+    def neighbours(self, indices):
+        # (len(indices), 18) successor indices, one column per move in MOVE_NAMES order
+        corners, twist = np.divmod(indices, tables.N_TWIST)
+        return self.corners_move[corners].astype(np.int64) * tables.N_TWIST + self.twist_move[twist]
+
+def _partial_rank(positions, n):
+    # Rank of rows of k distinct positions out of n (ordered), 0 for (0, 1, ..., k-1)
+    count, k = positions.shape
+    rank = np.zeros(count, dtype=np.int64)
+    for j in range(k):
+        smaller = (positions[:, :j] < positions[:, j:j + 1]).sum(axis=1)
+        rank = rank * (n - j) + positions[:, j] - smaller
+    return rank
+
+def _partial_unrank(count, n, k):
+    # Inverse of _partial_rank for every rank 0..count-1
+    ranks = np.arange(count, dtype=np.int64)
+    digits = np.zeros((count, k), dtype=np.int64)
+    for j in range(k - 1, -1, -1):
+        digits[:, j] = ranks % (n - j)
+        ranks //= n - j
+    used = np.zeros((count, n), dtype=bool)
+    positions = np.zeros((count, k), dtype=np.int8)
+    rows = np.arange(count)
+    for j in range(k):
+        free = np.cumsum(~used, axis=1)
+        positions[:, j] = np.argmax(free > digits[:, j:j + 1], axis=1)
+        used[rows, positions[:, j]] = True
+    return positions
+
+def _build_edge_tables(k):
+    # Where each of k tracked edges moves to, and which of them flip, for every move
+    positions = _partial_unrank(math.perm(12, k), 12, k)
+    destination = np.argsort(tables.MOVE_EP, axis=1)  # destination[m][p]: new position of the edge at p
+    position_move = np.empty((len(positions), 18), dtype=np.uint32)
+    flip_move = np.empty((len(positions), 18), dtype=np.uint16)
+    weights = 1 << np.arange(k - 1, -1, -1)
+    for m in range(18):
+        moved = destination[m][positions]
+        position_move[:, m] = _partial_rank(moved, 12)
+        flip_move[:, m] = (tables.MOVE_EO[m][moved] * weights).sum(axis=1)
+    return position_move, flip_move
+
+def edge_position_move(k, table_dir=None):
+    return tables.load_table(f'edge{k}_position_move', lambda: _build_edge_tables(k)[0], table_dir)
+
+def edge_flip_move(k, table_dir=None):
+    return tables.load_table(f'edge{k}_flip_move', lambda: _build_edge_tables(k)[1], table_dir)
+
+class EdgePattern:
+    """
+    Positions and orientations of a subset of the edges:
+    index = (rank of the tracked edges' positions) * 2**k + their orientation bits.
+    """
+    def __init__(self, edges, table_dir=None):
+        self.edges = tuple(edges)
+        self.table_dir = table_dir
+        self.k = len(self.edges)
+        self.name = 'edges_' + '_'.join(EDGES[e] for e in self.edges)
+        self.size = math.perm(12, self.k) << self.k
+        self.solved_index = int(_partial_rank(np.array([self.edges]), 12)[0]) << self.k
+        self.position_move = np.asarray(edge_position_move(self.k, table_dir))
+        self.flip_move = np.asarray(edge_flip_move(self.k, table_dir))
+
+    def spec(self):
+        return ('edges', self.edges, self.table_dir)
+
+    def index_of(self, cubie):
+        positions = [cubie.ep.index(edge) for edge in self.edges]
+        flips = 0
+        for position in positions:
+            flips = flips * 2 + cubie.eo[position]
+        return (int(_partial_rank(np.array([positions]), 12)[0]) << self.k) | flips
+
+    def neighbours(self, indices):
+        positions = indices >> self.k
+        flips = (indices & ((1 << self.k) - 1))[:, None]
+        return (self.position_move[positions].astype(np.int64) << self.k) | (flips ^ self.flip_move[positions])
+
+def make_pattern(spec):
+    kind, edges, table_dir = spec
+    if kind == 'corners':
+        return CornerPattern(table_dir)
+    if kind == 'edges':
+        return EdgePattern(edges, table_dir)
+    raise ValueError(f"Unknown pattern: {kind}")
+
+def read_nibbles(table, start, stop):
+    # Entries start..stop-1 (start even) of a nibble-packed table as a uint8 array
+    packed = np.asarray(table[start >> 1:(stop + 1) >> 1])
+    values = np.empty(len(packed) * 2, dtype=np.uint8)
+    values[0::2] = packed & 0xF
+    values[1::2] = packed >> 4
+    return values[:stop - start]
+
+def lookup_nibbles(table, indices):
+    packed = table[indices >> 1]
+    return np.where(indices & 1, packed >> 4, packed & 0xF)
+
+def write_nibbles(table, indices, value):
+    # Set entries (unique indices) still marked UNKNOWN to value; returns how many were set
+    indices = indices[lookup_nibbles(table, indices) == UNKNOWN]
+    even = indices[(indices & 1) == 0] >> 1
+    table[even] = (table[even] & 0xF0) | value
+    odd = indices[(indices & 1) == 1] >> 1
+    table[odd] = (table[odd] & 0x0F) | (value << 4)
+    return len(indices)
+
+# Per-process state of the pool workers
+_worker_pattern = None
+_worker_table = None
+
+def _init_worker(spec, path):
+    global _worker_pattern, _worker_table
+    _worker_pattern = make_pattern(spec)
+    _worker_table = np.memmap(path, dtype=np.uint8, mode='r')
+
+def _expand(task):
+    # Expand every entry at the given depth in [start, stop) and return the unreached successors
+    start, stop, depth = task
+    frontier = np.flatnonzero(read_nibbles(_worker_table, start, stop) == depth) + start
+    if not len(frontier):
+        return np.empty(0, dtype=np.int64)
+    successors = _worker_pattern.neighbours(frontier).ravel()
+    successors = np.sort(successors[lookup_nibbles(_worker_table, successors) == UNKNOWN])
+    # Drop duplicates; a sort plus neighbour comparison is much cheaper than np.unique here
+    keep = np.ones(len(successors), dtype=bool)
+    keep[1:] = successors[1:] != successors[:-1]
+    return successors[keep]
+
+def build(pattern, path, processes=None, chunk_size=1 << 22, verbose=True):
+    """
+    Build the pattern database of pattern into the file at path.
+    processes=1 runs in the current process; None uses every CPU.
+    """
+    chunk_size += chunk_size & 1
+    table = np.memmap(path, dtype=np.uint8, mode='w+', shape=((pattern.size + 1) >> 1,))
+    table[:] = 0xFF
+    write_nibbles(table, np.array([pattern.solved_index]), 0)
+    table.flush()
+
+    pool = None
+    if processes != 1:
+        pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=(pattern.spec(), path))
+    else:
+        _init_worker(pattern.spec(), path)
+    try:
+        depth, total, start_time = 0, 1, time.perf_counter()
+        while True:
+            tasks = [(start, min(start + chunk_size, pattern.size), depth)
+                     for start in range(0, pattern.size, chunk_size)]
+            results = pool.imap_unordered(_expand, tasks) if pool else map(_expand, tasks)
+            added = 0
+            for successors in results:
+                added += write_nibbles(table, successors, depth + 1)
+            table.flush()
+            if not added:
+                break
+            depth += 1
+            total += added
+            if verbose:
+                print(f"depth {depth:2d}: {added:>11,} entries ({total:,} / {pattern.size:,}, "
+                      f"{time.perf_counter() - start_time:.1f} s)")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    del table
+    return PatternDatabase(pattern, path)
+
+class PatternDatabase:
+    """Read-only view of a built database; the file is memory-mapped and shared between processes."""
+    def __init__(self, pattern, path):
+        self.pattern = pattern
+        self.path = path
+        self.table = np.memmap(path, dtype=np.uint8, mode='r')
+
+    def distance(self, index):
+        packed = int(self.table[index >> 1])
+        return packed >> 4 if index & 1 else packed & 0xF
+
+    def distances(self, indices):
+        return lookup_nibbles(self.table, np.asarray(indices, dtype=np.int64))
+
+    def distance_of(self, cubie):
+        return self.distance(self.pattern.index_of(cubie))
+
+def database_path(pattern, directory=None):
+    return os.path.join(directory or tables.TABLE_DIR, pattern.name + '.pdb')
+
+def load(pattern, directory=None, processes=None):
+    # Open the database of pattern, building it first if its file does not exist
+    path = database_path(pattern, directory)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        build(pattern, temp_path, processes)
+        os.replace(temp_path, path)
+    return PatternDatabase(pattern, path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a cube pattern database")
+    parser.add_argument('kind', choices=['corners', 'edges'])
+    parser.add_argument('edges', nargs='*', type=int, help="edge indices for an edge pattern, e.g. 0 1 2 3 4 5")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--directory', default=None)
+    args = parser.parse_args()
+    if args.kind == 'edges' and not args.edges:
+        parser.error("edge patterns need at least one edge index")
+    pattern = make_pattern((args.kind, args.edges, args.directory))
+    path = database_path(pattern, args.directory)
+    if os.path.exists(path):
+        print(f"{path} already exists")
+        sys.exit()
+    start = time.perf_counter()
+    load(pattern, args.directory, args.processes)
+    print(f"Built {path} in {time.perf_counter() - start:.1f} s")
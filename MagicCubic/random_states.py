@@ -0,0 +1,162 @@
+"""
+Uniformly random cube states.
+
+Instead of scrambling with random moves, every state is drawn directly: a random corner
+permutation, a random edge permutation, random orientations whose last piece fixes the
+sum, and a swap of the last two edges whenever the corner and edge parities differ.
+Each of the 43,252,003,274,489,856,000 reachable states is equally likely.
+
+States are generated in chunks with NumPy in the ArrayRubiksCube sticker layout and
+can be streamed to a text file (one line of 54 color letters per state) or a binary
+file (54 color-code bytes per state, readable with np.fromfile).
+Internally every array is laid out pieces x cubes, so each step is a run of 1-D
+gathers over whole rows instead of a strided 2-D fancy index.
+
+Usage:
+    python random_states.py 1000000 states.bin
+    python random_states.py 1000 states.txt --format text --seed 1
+"""
+import time
+import itertools
+import argparse
+import numpy as np
+import tables
+from cube_model import CORNERS, EDGES, CORNER_FACELETS, EDGE_FACELETS, FACE_ORDER, SOLVED_COLORS
+
+def _flat_index(facelets):
+    return [[FACE_ORDER.index(face) * 9 + row * 3 + col for face, row, col in piece] for piece in facelets]
+
+def _parity(perms):
+    # Permutation parity of every row (number of inversions mod 2)
+    n = perms.shape[1]
+    upper = np.triu(np.ones((n, n), dtype=bool), 1)
+    return (((perms[:, :, None] > perms[:, None, :]) & upper).sum(axis=(1, 2)) & 1).astype(np.int8)
+
+def _color_table(names, base):
+    # [slot][piece * base + orientation]: color code shown at a facelet slot of a position
+    return np.array([[FACE_ORDER.index(name[(slot - o) % base]) for name in names for o in range(base)]
+                     for slot in range(base)], dtype=np.uint8)
+
+# Flat sticker index of every facelet slot of each corner/edge position
+CORNER_INDEX = np.array(_flat_index(CORNER_FACELETS))
+EDGE_INDEX = np.array(_flat_index(EDGE_FACELETS))
+CORNER_COLORS = _color_table(CORNERS, 3)
+EDGE_COLORS = _color_table(EDGES, 2)
+CENTER_INDEX = np.arange(6) * 9 + 4
+
+# A random corner permutation is a random column of every permutation of 8. A random edge
+# permutation is built from a random choice of the six edges that go to positions 0..5
+# (EDGE_SPLITS: those six, then the other six, both sorted) and a random permutation of
+# each half, which covers all 12! permutations exactly once.
+CORNER_PERMUTATIONS = np.ascontiguousarray(tables.all_permutations(8).T)
+CORNER_PARITY = _parity(CORNER_PERMUTATIONS.T)
+HALF_PERMUTATIONS = np.ascontiguousarray(tables.all_permutations(6).T.astype(np.intp))
+HALF_PARITY = _parity(HALF_PERMUTATIONS.T)
+_splits = np.array([list(chosen) + [e for e in range(12) if e not in chosen]
+                    for chosen in itertools.combinations(range(12), 6)], dtype=np.int8)
+N_SPLITS = len(_splits)
+EDGE_SPLITS = np.ascontiguousarray(_splits.T).ravel()
+SPLIT_PARITY = _parity(_splits)
+
+FORMATS = ('binary', 'text')
+# Byte <-> color code lookups for the text format
+_LETTERS = np.frombuffer(''.join(SOLVED_COLORS).encode(), dtype=np.uint8)
+_CODES = np.full(256, 0xFF, dtype=np.uint8)
+_CODES[_LETTERS] = np.arange(6)
+
+def _orientations(rng, pieces, count, base):
+    orientation = rng.integers(0, base, size=(pieces, count), dtype=np.int8)
+    orientation[-1] = -orientation[:-1].sum(axis=0, dtype=np.int8) % base
+    return orientation
+
+def _random_pieces(count, rng):
+    # cp, co (8, count) and ep, eo (12, count) of uniformly random solvable cubes
+    corners = rng.integers(0, CORNER_PARITY.size, count)
+    split = rng.integers(0, N_SPLITS, count)
+    low, high = rng.integers(0, HALF_PARITY.size, (2, count))
+    ep = np.empty((12, count), dtype=np.int8)
+    for k in range(6):
+        ep[k] = EDGE_SPLITS[HALF_PERMUTATIONS[k][low] * N_SPLITS + split]
+        ep[k + 6] = EDGE_SPLITS[(HALF_PERMUTATIONS[k][high] + 6) * N_SPLITS + split]
+    odd = (CORNER_PARITY[corners] != (SPLIT_PARITY[split] ^ HALF_PARITY[low] ^ HALF_PARITY[high]))
+    ep[10], ep[11] = np.where(odd, ep[11], ep[10]), np.where(odd, ep[10], ep[11])
+    return (CORNER_PERMUTATIONS[:, corners], _orientations(rng, 8, count, 3),
+            ep, _orientations(rng, 12, count, 2))
+
+def _stickers(cp, co, ep, eo):
+    # (count, 54) states from pieces x cubes arrays
+    stickers = np.empty((54, cp.shape[1]), dtype=np.uint8)
+    stickers[CENTER_INDEX] = np.arange(6, dtype=np.uint8)[:, None]
+    for i in range(8):
+        key = cp[i] * 3 + co[i]
+        for slot in range(3):
+            stickers[CORNER_INDEX[i, slot]] = CORNER_COLORS[slot][key]
+    for i in range(12):
+        key = ep[i] * 2 + eo[i]
+        for slot in range(2):
+            stickers[EDGE_INDEX[i, slot]] = EDGE_COLORS[slot][key]
+    return np.ascontiguousarray(stickers.T)
+
+def random_cubies(count, rng=None):
+    """
+    Return (cp, co, ep, eo) arrays of count uniformly random solvable cubes,
+    one row per cube, with the meaning of the CubieCube fields.
+    """
+    return tuple(pieces.T for pieces in _random_pieces(count, np.random.default_rng(rng)))
+
+def cubies_to_states(cp, co, ep, eo):
+    # Vectorized CubieCube.to_faces: (count, 54) color-code states in the ArrayRubiksCube layout
+    return _stickers(*(np.asarray(pieces).T for pieces in (cp, co, ep, eo)))
+
+def random_states(count, rng=None):
+    # (count, 54) uniformly random states; wrap in RubiksCubeBatch or ArrayRubiksCube as needed
+    return _stickers(*_random_pieces(count, np.random.default_rng(rng)))
+
+def generate(count, chunk_size=1 << 16, seed=None):
+    # Yield count random states in chunks of at most chunk_size rows
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, chunk_size):
+        yield random_states(min(chunk_size, count - start), rng)
+
+def write_states(f, states, format='binary'):
+    # Append states to an open binary file
+    if format == 'binary':
+        f.write(np.ascontiguousarray(states, dtype=np.uint8).tobytes())
+    elif format == 'text':
+        lines = np.empty((len(states), 55), dtype=np.uint8)
+        lines[:, :54] = _LETTERS[states]
+        lines[:, 54] = ord('\n')
+        f.write(lines.tobytes())
+    else:
+        raise ValueError(f"Unknown format: {format!r}")
+
+def read_states(path, format='binary'):
+    # Load a file written by write_states as a (count, 54) array
+    data = np.fromfile(path, dtype=np.uint8)
+    if format == 'binary':
+        return data.reshape(-1, 54)
+    if format == 'text':
+        states = _CODES[data.reshape(-1, 55)[:, :54]]
+        if (states == 0xFF).any():
+            raise ValueError(f"Invalid sticker color in {path}")
+        return states
+    raise ValueError(f"Unknown format: {format!r}")
+
+def save_random_states(path, count, format='binary', seed=None, chunk_size=1 << 16):
+    # Stream count random states to path without holding more than one chunk in memory
+    with open(path, 'wb') as f:
+        for states in generate(count, chunk_size, seed):
+            write_states(f, states, format)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write uniformly random cube states to a file")
+    parser.add_argument('count', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=FORMATS, default='binary')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    save_random_states(args.path, args.count, args.format, args.seed)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {args.count:,} states to {args.path} in {seconds:.2f} s "
+          f"({args.count / seconds:,.0f} states/s)")
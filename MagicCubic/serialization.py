@@ -0,0 +1,269 @@
+"""
+Compact binary formats for cube states and move sequences.
+
+A state stores each of its 54 color codes in 3 bits: every 8 stickers fill 3 bytes,
+so a state takes 21 bytes (the last group holds 6 stickers and 2 zero codes), 10 to 12
+times less than a pickled faces dict of lists (about 220 bytes per state in a pickled list,
+252 bytes on its own).
+A move sequence is a varint move count followed by one varint code per move. The codes
+index MOVE_CODES (the 18 face turns in MOVE_NAMES order, then wide turns, slices and
+rotations), so every move currently takes a single byte.
+
+Files start with a 16-byte header: the magic b'CUBE', the format version, the record
+kind, 2 reserved bytes and the record count as a little-endian uint64.
+A state file continues with the fixed 21-byte records and is memory-mapped on read.
+A move-log file continues with count + 1 uint64 byte offsets and then the encoded
+sequences, so any sequence can be read without decoding the ones before it.
+
+Usage:
+    python serialization.py convert corpus.pkl corpus.states
+    python serialization.py moves scrambles.txt scrambles.moves
+    python serialization.py info corpus.states
+"""
+import os
+import pickle
+import struct
+import argparse
+import numpy as np
+from cube_model import ArrayRubiksCube, FACE_ORDER, NOTATION_PERMUTATIONS, state_of, expand_algorithm
+
+MAGIC = b'CUBE'
+VERSION = 1
+STATES = 0
+MOVE_LOGS = 1
+KIND_NAMES = {STATES: 'states', MOVE_LOGS: 'move logs'}
+HEADER = struct.Struct('<4sBB2xQ')
+
+STATE_BYTES = 21
+# Bit offset of each sticker inside its 3-byte group
+_STICKER_SHIFTS = np.arange(8, dtype=np.uint32) * 3
+_BYTE_SHIFTS = np.arange(3, dtype=np.uint32) * 8
+
+# Move code -> canonical move name; the face turns keep their MOVE_NAMES index
+MOVE_CODES = tuple(NOTATION_PERMUTATIONS)
+MOVE_CODE_INDEX = {move: code for code, move in enumerate(MOVE_CODES)}
+
+def pack_states(states):
+    # (count, 54) color codes -> (count, 21) bytes
+    states = np.asarray(states, dtype=np.uint8).reshape(-1, 54)
+    if (states > 5).any():
+        raise ValueError("Color codes must be in 0..5")
+    padded = np.zeros((len(states), 56), dtype=np.uint32)
+    padded[:, :54] = states
+    groups = (padded.reshape(-1, 7, 8) << _STICKER_SHIFTS).sum(axis=2, dtype=np.uint32)
+    return ((groups[:, :, None] >> _BYTE_SHIFTS) & 0xFF).astype(np.uint8).reshape(-1, STATE_BYTES)
+
+def unpack_states(packed):
+    # (count, 21) bytes -> (count, 54) color codes
+    packed = np.asarray(packed, dtype=np.uint8).reshape(-1, 7, 3).astype(np.uint32)
+    groups = packed[:, :, 0] | packed[:, :, 1] << 8 | packed[:, :, 2] << 16
+    stickers = (groups[:, :, None] >> _STICKER_SHIFTS) & 7
+    return stickers.reshape(-1, 56)[:, :54].astype(np.uint8)
+
+def encode_state(cube):
+    # 21 bytes for one cube
+    return pack_states(state_of(cube)).tobytes()
+
+def decode_state(data):
+    return ArrayRubiksCube(unpack_states(np.frombuffer(data, dtype=np.uint8))[0])
+
+def encode_varints(values):
+    # Unsigned LEB128: 7 bits per byte, high bit set on every byte but the last of a value
+    values = np.asarray(values, dtype=np.uint64).reshape(-1)
+    lengths = np.ones(len(values), dtype=np.intp)
+    for k in range(1, 10):
+        lengths += values >= np.uint64(1 << (7 * k))
+    starts = np.cumsum(lengths) - lengths
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max(initial=0))):
+        used = lengths > k
+        byte = ((values[used] >> np.uint64(7 * k)) & np.uint64(0x7F)).astype(np.uint8)
+        out[starts[used] + k] = np.where(lengths[used] > k + 1, byte | 0x80, byte)
+    return out.tobytes()
+
+def decode_varints(data):
+    # Inverse of encode_varints; raises ValueError if the last value is cut off
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = np.frombuffer(data, dtype=np.uint8)
+    ends = (data & 0x80) == 0
+    if len(data) and not ends[-1]:
+        raise ValueError("Truncated varint")
+    value_index = np.cumsum(ends) - ends
+    # First byte of every value
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    position = np.arange(len(data)) - starts[value_index]
+    values = np.zeros(int(ends.sum()), dtype=np.uint64)
+    for k in range(int(position.max(initial=-1)) + 1):
+        at = position == k
+        values[value_index[at]] |= (data[at] & 0x7F).astype(np.uint64) << np.uint64(7 * k)
+    return values
+
+def move_codes(moves):
+    # Codes of a move string or list, one per written move (see expand_algorithm)
+    if isinstance(moves, str):
+        moves = expand_algorithm(moves)
+    codes = []
+    for move in moves:
+        if move in MOVE_CODE_INDEX:
+            codes.append(MOVE_CODE_INDEX[move])
+        else:
+            codes.extend(MOVE_CODE_INDEX[m] for m in expand_algorithm(move))
+    return codes
+
+def encode_moves(moves):
+    codes = move_codes(moves)
+    return encode_varints([len(codes)] + codes)
+
+def decode_moves(data):
+    # List of move names from encode_moves output
+    values = decode_varints(data)
+    if len(values) == 0 or int(values[0]) != len(values) - 1:
+        raise ValueError("Move count does not match the encoded moves")
+    return [MOVE_CODES[code] for code in values[1:].tolist()]
+
+def _write_header(f, kind, count):
+    f.write(HEADER.pack(MAGIC, VERSION, kind, count))
+
+def read_header(path):
+    # (kind, count) of a file written by this module
+    with open(path, 'rb') as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is too short for a header")
+    magic, version, kind, count = HEADER.unpack(data)
+    if magic != MAGIC or kind not in KIND_NAMES:
+        raise ValueError(f"{path} is not a cube file")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported format version {version}")
+    return kind, count
+
+def _check_kind(path, expected):
+    kind, count = read_header(path)
+    if kind != expected:
+        raise ValueError(f"{path} holds {KIND_NAMES[kind]}, not {KIND_NAMES[expected]}")
+    return count
+
+def save_states(path, states, chunk_size=1 << 16):
+    """
+    Write states to path. states is a (count, 54) array, or an iterable of cubes,
+    faces dicts, single states or (rows, 54) chunks, which is streamed chunk by chunk.
+    Returns the number of states written.
+    """
+    if isinstance(states, np.ndarray):
+        states = [states]
+    count = 0
+    with open(path, 'wb') as f:
+        _write_header(f, STATES, 0)
+        pending, pending_rows = [], 0
+        for item in states:
+            rows = state_of(item).reshape(-1, 54)
+            pending.append(rows)
+            pending_rows += len(rows)
+            if pending_rows >= chunk_size:
+                f.write(pack_states(np.concatenate(pending)).tobytes())
+                count += pending_rows
+                pending, pending_rows = [], 0
+        if pending:
+            f.write(pack_states(np.concatenate(pending)).tobytes())
+            count += pending_rows
+        # The count is only known now
+        f.seek(0)
+        _write_header(f, STATES, count)
+    return count
+
+def open_states(path):
+    # Packed (count, 21) records of a state file, memory-mapped read-only
+    count = _check_kind(path, STATES)
+    if os.path.getsize(path) < HEADER.size + count * STATE_BYTES:
+        raise ValueError(f"{path} is truncated")
+    if count == 0:
+        return np.zeros((0, STATE_BYTES), dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER.size, shape=(count, STATE_BYTES))
+
+def load_states(path, start=0, stop=None):
+    # States start..stop-1 of a state file as a (rows, 54) array; only those records are read
+    return unpack_states(open_states(path)[start:stop])
+
+def iter_states(path, chunk_size=1 << 16):
+    # Yield the states of a file in (rows, 54) chunks
+    records = open_states(path)
+    for start in range(0, len(records), chunk_size):
+        yield unpack_states(records[start:start + chunk_size])
+
+def save_move_logs(path, sequences):
+    # Write move sequences (strings or lists of moves); returns the number written
+    encoded = [encode_moves(moves) for moves in sequences]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    with open(path, 'wb') as f:
+        _write_header(f, MOVE_LOGS, len(encoded))
+        f.write(offsets.tobytes())
+        f.write(b''.join(encoded))
+    return len(encoded)
+
+class MoveLogs:
+    """
+    Read-only, memory-mapped view of a move-log file.
+    logs[i] decodes only the i-th sequence into a list of moves; iterating decodes them in order.
+    """
+    def __init__(self, path):
+        count = _check_kind(path, MOVE_LOGS)
+        self.path = path
+        self.offsets = np.memmap(path, dtype='<u8', mode='r', offset=HEADER.size, shape=(count + 1,))
+        data_offset = HEADER.size + self.offsets.nbytes
+        if os.path.getsize(path) < data_offset + int(self.offsets[-1]):
+            raise ValueError(f"{path} is truncated")
+        if self.offsets[-1]:
+            self.data = np.memmap(path, dtype=np.uint8, mode='r', offset=data_offset,
+                                  shape=(int(self.offsets[-1]),))
+        else:
+            self.data = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        index %= len(self)
+        return decode_moves(self.data[int(self.offsets[index]):int(self.offsets[index + 1])])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+def _pickled_states(path):
+    # A pickled faces dict, a list of them, or a dict of them keyed by name
+    with open(path, 'rb') as f:
+        corpus = pickle.load(f)
+    if isinstance(corpus, dict):
+        corpus = [corpus] if set(corpus) == set(FACE_ORDER) else list(corpus.values())
+    return corpus
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert and inspect compact cube files")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help="pickled faces dicts -> state file")
+    convert.add_argument('source')
+    convert.add_argument('path')
+    moves = commands.add_parser('moves', help="text file with one move sequence per line -> move-log file")
+    moves.add_argument('source')
+    moves.add_argument('path')
+    info = commands.add_parser('info', help="describe a state or move-log file")
+    info.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        count = save_states(args.path, _pickled_states(args.source))
+        print(f"Wrote {count:,} states to {args.path} ({os.path.getsize(args.path):,} bytes, "
+              f"{os.path.getsize(args.source):,} bytes pickled)")
+    elif args.command == 'moves':
+        with open(args.source) as f:
+            count = save_move_logs(args.path, [line for line in f if line.strip()])
+        print(f"Wrote {count:,} move sequences to {args.path} ({os.path.getsize(args.path):,} bytes)")
+    else:
+        kind, count = read_header(args.path)
+        print(f"{args.path}: {count:,} {KIND_NAMES[kind]}, {os.path.getsize(args.path):,} bytes")
+        if count and kind == STATES:
+            print("First state solved:", ArrayRubiksCube(load_states(args.path, 0, 1)[0]).is_solved())
+        elif count:
+            print("First sequence:", ' '.join(MoveLogs(args.path)[0]))
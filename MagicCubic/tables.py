@@ -0,0 +1,197 @@
+"""
+Move and pruning tables for the coordinate-level cube model (CubieCube).
+
+Every table is built with NumPy the first time it is needed, saved as a .npy file
+and memory-mapped on later runs, so a new process is ready almost immediately
+and processes that load the same table share its pages.
+Move tables have one row per coordinate value and one column per move in MOVE_NAMES order.
+"""
+import os
+import math
+import itertools
+import numpy as np
+from cube_model import CubieCube, MOVE_CUBES, MOVE_NAMES
+
+TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+
+N_TWIST = 2187
+N_FLIP = 2048
+N_SLICE = 495
+N_SLICE_SORTED = 11880
+N_CORNERS = 40320
+N_UD_EDGES = 40320
+N_PHASE2_SLICE = 24
+
+# Moves that keep the cube inside the phase-2 subgroup <U, D, R2, L2, F2, B2>
+PHASE2_MOVES = tuple(MOVE_NAMES.index(name) for name in
+                     ('U', 'U\'', 'U2', 'D', 'D\'', 'D2', 'F2', 'B2', 'L2', 'R2'))
+
+# Cubie permutations and orientation changes of each move, shape (18, 8) and (18, 12)
+MOVE_CP = np.array([MOVE_CUBES[name].cp for name in MOVE_NAMES])
+MOVE_CO = np.array([MOVE_CUBES[name].co for name in MOVE_NAMES])
+MOVE_EP = np.array([MOVE_CUBES[name].ep for name in MOVE_NAMES])
+MOVE_EO = np.array([MOVE_CUBES[name].eo for name in MOVE_NAMES])
+
+def load_table(name, build, directory=None):
+    """
+    Return the table stored as <directory>/<name>.npy, memory-mapped read-only.
+    If the file does not exist yet, build() is called and its result saved first.
+    """
+    path = os.path.join(directory or TABLE_DIR, name + '.npy')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = build()
+        # Write to a private file first so concurrent builders never see a partial table
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, table)
+        os.replace(temp_path, path)
+    return np.load(path, mmap_mode='r')
+
+def rank_rows(rows):
+    # Lehmer rank of every row of distinct integers, matching CubieCube's permutation coordinates
+    rows = np.asarray(rows)
+    n = rows.shape[1]
+    rank = np.zeros(len(rows), dtype=np.int64)
+    for i in range(n):
+        less = (rows[:, i + 1:] < rows[:, i:i + 1]).sum(axis=1)
+        rank = rank * (n - i) + less
+    return rank
+
+def all_permutations(n):
+    # Every permutation of range(n) in rank order
+    return np.array(list(itertools.permutations(range(n))), dtype=np.int8)
+
+def decode_orientations(count, base, pieces):
+    # Orientation arrays for coordinates 0..count-1 (twist or flip); the last piece fixes the sum
+    values = np.arange(count)
+    orientations = np.zeros((count, pieces), dtype=np.int8)
+    for i in range(pieces - 2, -1, -1):
+        orientations[:, i] = values % base
+        values //= base
+    orientations[:, -1] = -orientations[:, :-1].sum(axis=1) % base
+    return orientations
+
+def encode_orientations(orientations, base):
+    value = np.zeros(len(orientations), dtype=np.int64)
+    for i in range(orientations.shape[1] - 1):
+        value = value * base + orientations[:, i]
+    return value
+
+def encode_slice_sorted(ep):
+    # Vectorized CubieCube.slice_sorted for rows of edge permutations
+    in_slice = ep >= 8
+    combination = np.zeros(len(ep), dtype=np.int64)
+    found = np.zeros(len(ep), dtype=np.int64)
+    comb = np.array([[math.comb(n, k) for k in range(5)] for n in range(12)], dtype=np.int64)
+    for j in range(11, -1, -1):
+        found += in_slice[:, j]
+        combination += np.where(in_slice[:, j], comb[11 - j, np.minimum(found, 4)], 0)
+    order = ep[in_slice].reshape(-1, 4)
+    return combination * 24 + rank_rows(order)
+
+def _build_twist_move():
+    co = decode_orientations(N_TWIST, 3, 8)
+    return np.stack([encode_orientations((co[:, MOVE_CP[m]] + MOVE_CO[m]) % 3, 3)
+                     for m in range(18)], axis=1).astype(np.uint16)
+
+def _build_flip_move():
+    eo = decode_orientations(N_FLIP, 2, 12)
+    return np.stack([encode_orientations((eo[:, MOVE_EP[m]] + MOVE_EO[m]) % 2, 2)
+                     for m in range(18)], axis=1).astype(np.uint16)
+
+def _build_slice_sorted_move():
+    ep = np.zeros((N_SLICE_SORTED, 12), dtype=np.int8)
+    cube = CubieCube()
+    for value in range(N_SLICE_SORTED):
+        cube.slice_sorted = value
+        ep[value] = cube.ep
+    return np.stack([encode_slice_sorted(ep[:, MOVE_EP[m]]) for m in range(18)], axis=1).astype(np.uint16)
+
+def _build_corners_move():
+    cp = all_permutations(8)
+    return np.stack([rank_rows(cp[:, MOVE_CP[m]]) for m in range(18)], axis=1).astype(np.uint16)
+
+def _build_ud_edges_move():
+    # Only defined for phase-2 moves; the other columns hold 0xFFFF
+    ep = np.hstack([all_permutations(8), np.tile(np.arange(8, 12, dtype=np.int8), (N_UD_EDGES, 1))])
+    table = np.full((N_UD_EDGES, 18), 0xFFFF, dtype=np.uint16)
+    for m in PHASE2_MOVES:
+        table[:, m] = rank_rows(ep[:, MOVE_EP[m]][:, :8])
+    return table
+
+def twist_move(directory=None):
+    return load_table('twist_move', _build_twist_move, directory)
+
+def flip_move(directory=None):
+    return load_table('flip_move', _build_flip_move, directory)
+
+def slice_sorted_move(directory=None):
+    return load_table('slice_sorted_move', _build_slice_sorted_move, directory)
+
+def slice_move(directory=None):
+    # Rows s * 24 of the slice_sorted table have the slice edges in order, so // 24 is the new slice
+    return load_table('slice_move',
+                      lambda: (slice_sorted_move(directory)[::24] // 24).astype(np.uint16), directory)
+
+def corners_move(directory=None):
+    return load_table('corners_move', _build_corners_move, directory)
+
+def ud_edges_move(directory=None):
+    return load_table('ud_edges_move', _build_ud_edges_move, directory)
+
+def breadth_first_distances(size, neighbours):
+    """
+    Distance from coordinate 0 (solved) to every coordinate of a size-entry space.
+    neighbours(frontier) returns the (len(frontier), moves) array of successor coordinates.
+    """
+    distance = np.full(size, -1, dtype=np.int8)
+    distance[0] = 0
+    frontier = np.zeros(1, dtype=np.int64)
+    depth = 0
+    reached = np.zeros(size, dtype=bool)
+    while len(frontier):
+        reached[neighbours(frontier).ravel()] = True
+        frontier = np.flatnonzero(reached & (distance < 0))
+        reached[:] = False
+        depth += 1
+        distance[frontier] = depth
+    return distance
+
+def slice_twist_prune(directory=None):
+    # Phase-1 distance over slice * N_TWIST + twist
+    def build():
+        slices, twists = np.asarray(slice_move(directory)), np.asarray(twist_move(directory))
+        return breadth_first_distances(
+            N_SLICE * N_TWIST,
+            lambda f: slices[f // N_TWIST].astype(np.int64) * N_TWIST + twists[f % N_TWIST])
+    return load_table('slice_twist_prune', build, directory)
+
+def slice_flip_prune(directory=None):
+    # Phase-1 distance over slice * N_FLIP + flip
+    def build():
+        slices, flips = np.asarray(slice_move(directory)), np.asarray(flip_move(directory))
+        return breadth_first_distances(
+            N_SLICE * N_FLIP,
+            lambda f: slices[f // N_FLIP].astype(np.int64) * N_FLIP + flips[f % N_FLIP])
+    return load_table('slice_flip_prune', build, directory)
+
+def corners_slice_prune(directory=None):
+    # Phase-2 distance over corners * 24 + slice_sorted
+    def build():
+        corners = np.asarray(corners_move(directory))[:, PHASE2_MOVES].astype(np.int64)
+        slices = np.asarray(slice_sorted_move(directory))[:N_PHASE2_SLICE][:, PHASE2_MOVES]
+        return breadth_first_distances(
+            N_CORNERS * N_PHASE2_SLICE,
+            lambda f: corners[f // N_PHASE2_SLICE] * N_PHASE2_SLICE + slices[f % N_PHASE2_SLICE])
+    return load_table('corners_slice_prune', build, directory)
+
+def ud_edges_slice_prune(directory=None):
+    # Phase-2 distance over ud_edges * 24 + slice_sorted
+    def build():
+        edges = np.asarray(ud_edges_move(directory))[:, PHASE2_MOVES].astype(np.int64)
+        slices = np.asarray(slice_sorted_move(directory))[:N_PHASE2_SLICE][:, PHASE2_MOVES]
+        return breadth_first_distances(
+            N_UD_EDGES * N_PHASE2_SLICE,
+            lambda f: edges[f // N_PHASE2_SLICE] * N_PHASE2_SLICE + slices[f % N_PHASE2_SLICE])
+    return load_table('ud_edges_slice_prune', build, directory)
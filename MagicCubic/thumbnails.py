@@ -0,0 +1,150 @@
+"""
+Offscreen thumbnails of cube states, rendered with NumPy only (PIL just writes the files).
+
+Every view is rasterized once into a label map: an image-sized array holding, for each
+pixel, the flat index of the sticker it shows (faces_to_state order), or BACKGROUND /
+BORDER. Drawing a state is then a gather of its color codes through the label map and a
+gather of RGB values through the palette, and a batch of states is drawn in one go.
+Views:
+    isometric   the U, F and R faces seen from the URF corner; size is the image width and height
+    net         the unfolded cross (U on top, L F R B in the middle row, D below);
+                size is the width of one face, the image is 4 * size x 3 * size
+
+Usage:
+    python thumbnails.py "R U R' U'" cube.png
+    python thumbnails.py --random 100 sheet.png --view net --size 48
+"""
+import time
+import argparse
+import functools
+import numpy as np
+from PIL import Image
+from cube_model import ArrayRubiksCube, FACE_ORDER, FACELET_POINTS, FACE_NORMALS, state_of
+
+VIEWS = ('isometric', 'net')
+# Label values after the 54 stickers
+BACKGROUND = 54
+BORDER = 55
+# RGB of color codes 0..5 (SOLVED_COLORS: W Y G B O R), then background and border
+PALETTE = np.array([(255, 255, 255), (255, 255, 0), (0, 200, 0), (0, 0, 255), (255, 128, 0), (255, 0, 0),
+                    (224, 224, 224), (0, 0, 0)], dtype=np.uint8)
+# Cell grid position (column, row) of every face in the net
+NET_CELLS = {'U': (1, 0), 'L': (0, 1), 'F': (1, 1), 'R': (2, 1), 'B': (3, 1), 'D': (1, 2)}
+# Sticker index by facelet point (2 * cubelet + normal, coordinates -3..3), shifted to 0..6
+_POINT_STICKER = np.full((7, 7, 7), BACKGROUND, dtype=np.intp)
+_POINT_STICKER[tuple((FACELET_POINTS + 3).T)] = np.arange(54)
+
+def _isometric_labels(size, border):
+    # Orthographic rays along the URF diagonal, intersected with the three faces they can see
+    view = np.array([1.0, 1.0, 1.0]) / np.sqrt(3)
+    right = np.array([1.0, 0.0, -1.0]) / np.sqrt(2)
+    up = np.cross(view, right)
+    # The cube spans [-1.5, 1.5] on every axis (cubelets 1 wide); leave a small margin
+    corners = np.array([(x, y, z) for x in (-1.5, 1.5) for y in (-1.5, 1.5) for z in (-1.5, 1.5)])
+    scale = size / (2.1 * max(np.abs(corners @ right).max(), np.abs(corners @ up).max()))
+    pixels = (np.arange(size) + 0.5 - size / 2) / scale
+    u, v = np.meshgrid(pixels, -pixels)
+    origins = u[..., None] * right + v[..., None] * up
+    labels = np.full((size, size), BACKGROUND, dtype=np.intp)
+    nearest = np.full((size, size), np.inf)
+    for face in ('U', 'F', 'R'):
+        normal = FACE_NORMALS[face]
+        # Points origin - t * view on the face plane normal . p = 1.5
+        t = (origins @ normal - 1.5) / (view @ normal)
+        points = origins - t[..., None] * view
+        inside = (np.abs(points) <= 1.5 + 1e-9).all(axis=-1) & (t < nearest)
+        cubelets = np.clip(np.floor(points + 0.5), -1, 1)
+        # Distance from the nearest cubelet edge within the face plane
+        offsets = np.abs(points - cubelets) * (1 - np.abs(normal))
+        edge = offsets.max(axis=-1) > 0.5 - border
+        stickers = _POINT_STICKER[tuple(np.moveaxis((2 * cubelets + normal).astype(int) + 3, -1, 0))]
+        labels[inside] = np.where(edge, BORDER, stickers)[inside]
+        nearest[inside] = t[inside]
+    return labels
+
+def _net_labels(size, border):
+    labels = np.full((3 * size, 4 * size), BACKGROUND, dtype=np.intp)
+    # Position of every pixel of a face cell in sticker units (0..3)
+    coords = (np.arange(size) + 0.5) * 3 / size
+    rows, cols = np.meshgrid(coords, coords, indexing='ij')
+    sticker = np.floor(rows).astype(int) * 3 + np.floor(cols).astype(int)
+    frac_rows, frac_cols = rows % 1, cols % 1
+    edge = np.maximum(np.abs(frac_rows - 0.5), np.abs(frac_cols - 0.5)) > 0.5 - border
+    for f, face in enumerate(FACE_ORDER):
+        column, row = NET_CELLS[face]
+        cell = labels[row * size:(row + 1) * size, column * size:(column + 1) * size]
+        cell[:] = np.where(edge, BORDER, f * 9 + sticker)
+    return labels
+
+@functools.lru_cache(maxsize=32)
+def label_map(view='isometric', size=64, border=0.06):
+    """
+    Label map of a view: for every pixel the sticker index it shows, or BACKGROUND / BORDER.
+    border is the half width of the black grid lines in sticker units.
+    """
+    if view == 'isometric':
+        labels = _isometric_labels(size, border)
+    elif view == 'net':
+        labels = _net_labels(size, border)
+    else:
+        raise ValueError(f"Unknown view: {view!r}")
+    labels.flags.writeable = False
+    return labels
+
+def _states(cubes):
+    if isinstance(cubes, np.ndarray):
+        return cubes.reshape(-1, 54)
+    return np.array([state_of(cube) for cube in cubes], dtype=np.uint8).reshape(-1, 54)
+
+def render_states(states, view='isometric', size=64):
+    """
+    Render many states at once. Returns a (count, height, width, 3) uint8 array.
+    states is a (count, 54) color-code array (or a list of cubes, faces dicts or states).
+    """
+    states = _states(states)
+    labels = label_map(view, size)
+    # Color codes extended with the background and border entries of the palette
+    codes = np.empty((len(states), 56), dtype=np.uint8)
+    codes[:, :54] = states
+    codes[:, BACKGROUND] = 6
+    codes[:, BORDER] = 7
+    return PALETTE[codes[:, labels]]
+
+def render(cube, view='isometric', size=64):
+    # PIL image of one cube (either backend), faces dict or state
+    return Image.fromarray(render_states([cube], view, size)[0])
+
+def contact_sheet(states, view='isometric', size=64, columns=10):
+    # All states tiled into one PIL image, row by row
+    images = render_states(states, view, size)
+    count, height, width, _ = images.shape
+    rows = -(-count // columns)
+    sheet = np.full((rows * height, columns * width, 3), PALETTE[6], dtype=np.uint8)
+    for i in range(count):
+        row, column = divmod(i, columns)
+        sheet[row * height:(row + 1) * height, column * width:(column + 1) * width] = images[i]
+    return Image.fromarray(sheet)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render cube states to PNG without OpenGL")
+    parser.add_argument('moves', nargs='?', default='', help="algorithm applied to a solved cube")
+    parser.add_argument('path')
+    parser.add_argument('--view', choices=VIEWS, default='isometric')
+    parser.add_argument('--size', type=int, default=128)
+    parser.add_argument('--random', type=int, metavar='COUNT',
+                        help="draw a contact sheet of COUNT uniformly random states instead")
+    args = parser.parse_args()
+
+    if args.random:
+        from random_states import random_states
+        states = random_states(args.random)
+        start = time.perf_counter()
+        sheet = contact_sheet(states, args.view, args.size)
+        seconds = time.perf_counter() - start
+        sheet.save(args.path)
+        print(f"Rendered {args.random} states in {seconds:.3f} s ({args.random / seconds:,.0f} per second)")
+    else:
+        cube = ArrayRubiksCube()
+        if args.moves:
+            cube.apply_algorithm(args.moves)
+        render(cube, args.view, args.size).save(args.path)